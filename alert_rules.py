@@ -0,0 +1,104 @@
+# alert_rules.py
+
+import operator
+import threading
+import time
+from collections import deque
+import numpy as np
+
+COMPARATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+# --- Rule Definition ---
+class AlertRule:
+    """A threshold on one metric that must hold for `for_seconds` before the alert fires."""
+
+    def __init__(self, name, metric, op, threshold, for_seconds=0, severity="warning"):
+        if op not in COMPARATORS:
+            raise ValueError(f"Unsupported comparison operator: {op}")
+        self.name = name
+        self.metric = metric
+        self.op = op
+        self.threshold = float(threshold)
+        self.for_seconds = float(for_seconds)
+        self.severity = severity
+
+    def describe(self):
+        duration = f" for {self.for_seconds / 60:g} min" if self.for_seconds else ""
+        return f"{self.metric} {self.op} {self.threshold:g}{duration}"
+
+
+# --- Incremental Evaluation ---
+class AlertEngine:
+    """
+    Evaluates rules against RingSeries incrementally. Each rule remembers the last
+    sample it has seen and when its condition started holding, so every evaluation
+    only looks at the samples that arrived since the previous one.
+    """
+
+    def __init__(self, rules, max_events=200):
+        self.rules = list(rules)
+        self._state = {}
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+
+    def evaluate(self, series_by_metric, now=None):
+        """Feeds new samples into every rule; returns the list of currently firing alerts."""
+        now = now or time.time()
+        with self._lock:
+            for rule in self.rules:
+                series = series_by_metric.get(rule.metric)
+                if series is not None:
+                    self._evaluate_rule(rule, series, now)
+            return self._firing()
+
+    def _evaluate_rule(self, rule, series, now):
+        state = self._state.setdefault(
+            rule.name, {"last_ts": None, "pending_since": None, "firing": False, "value": None}
+        )
+        since = None if state["last_ts"] is None else np.nextafter(state["last_ts"], np.inf)
+        timestamps, values = series.snapshot(since=since)
+        if len(timestamps) == 0:
+            return
+
+        breached = COMPARATORS[rule.op](values, rule.threshold)
+        state["last_ts"] = float(timestamps[-1])
+        state["value"] = float(values[-1])
+
+        # Any clear sample in the batch ends a firing alert, even if the condition breached again after it
+        clear = np.flatnonzero(~breached)
+        if len(clear) and state["firing"]:
+            state["firing"] = False
+            self._record(rule, "resolved", float(values[clear[-1]]), now)
+
+        if not breached[-1]:
+            state["pending_since"] = None
+            return
+
+        # The condition has held since the sample after the last non-breaching one
+        if len(clear):
+            state["pending_since"] = float(timestamps[clear[-1] + 1])
+        elif state["pending_since"] is None:
+            state["pending_since"] = float(timestamps[0])
+
+        if not state["firing"] and state["last_ts"] - state["pending_since"] >= rule.for_seconds:
+            state["firing"] = True
+            self._record(rule, "firing", state["value"], now)
+
+    def _record(self, rule, status, value, now):
+        self._events.appendleft({
+            "Time": now, "Alert": rule.name, "Status": status, "Severity": rule.severity,
+            "Value": value, "Rule": rule.describe()
+        })
+
+    def _firing(self):
+        alerts = []
+        for rule in self.rules:
+            state = self._state.get(rule.name)
+            if state and state["firing"]:
+                alerts.append({"rule": rule, "value": state["value"], "since": state["pending_since"]})
+        return alerts
+
+    def events(self):
+        """Returns fired/resolved notifications, newest first."""
+        with self._lock:
+            return list(self._events)
@@ -0,0 +1,57 @@
+# anomaly_detection.py
+
+import numpy as np
+import pandas as pd
+
+# --- Alignment ---
+def build_aligned_frame(series_map, step_seconds):
+    """
+    Puts every (timestamps, values) series on a shared step grid as one column of a wide
+    DataFrame, so all series can be scored together. Missing samples become NaN.
+    """
+    columns = {}
+    for key, (timestamps, values) in series_map.items():
+        if len(timestamps) == 0:
+            continue
+        grid = np.round(np.asarray(timestamps) / step_seconds) * step_seconds
+        column = pd.Series(values, index=grid)
+        columns[key] = column[~column.index.duplicated(keep="last")]
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns).sort_index()
+
+
+# --- EWMA / Z-Score Detection ---
+def ewma_zscores(frame, span=20, min_periods=10, min_spread=1.0):
+    """
+    Scores each sample against the exponentially weighted mean and standard deviation
+    of the samples before it. Works column-wise over the whole frame in one pass.
+    `min_spread` (a scalar or one value per column) stops near-flat series from turning
+    tiny wobbles into huge scores.
+    """
+    weighted = frame.ewm(span=span, min_periods=min_periods, ignore_na=True)
+    baseline = weighted.mean().shift(1)
+    spread = weighted.std().shift(1).clip(lower=min_spread, axis=1)
+    return (frame - baseline) / spread
+
+
+def detect_anomalies(frame, span=20, threshold=3.0, rate_columns=(), min_spread=1.0, rate_min_spread=0.01):
+    """
+    Returns (scored, mask): z-scores for every column and a boolean frame marking samples
+    whose absolute score exceeds `threshold`. Columns in `rate_columns` are scored on
+    their per-step change instead of their level (e.g. disk fill rate).
+    """
+    if frame.empty:
+        return frame, frame.astype(bool)
+
+    signal = frame.copy()
+    rate_columns = [c for c in rate_columns if c in signal.columns]
+    if rate_columns:
+        signal[rate_columns] = signal[rate_columns].diff()
+
+    floor = pd.Series(float(min_spread), index=signal.columns)
+    floor[rate_columns] = rate_min_spread
+
+    scored = ewma_zscores(signal, span=span, min_periods=min(span, 10), min_spread=floor)
+    mask = scored.abs() > threshold
+    return scored, mask
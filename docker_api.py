@@ -0,0 +1,304 @@
+# docker_api.py
+
+import http.client
+import io
+import json
+import shlex
+import threading
+import time
+from urllib.parse import urlencode, quote
+import paramiko
+
+# Bridges the channel's stdin/stdout to the remote Docker socket (what `docker -H ssh://` uses)
+DOCKER_DIAL_COMMAND = "docker system dial-stdio"
+
+class DockerAPIError(Exception):
+    """An error response from the Docker Engine API."""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+# --- HTTP Over an SSH Channel ---
+class _ChannelSocket(io.RawIOBase):
+    """
+    Makes a paramiko channel look like a socket to http.client. Responses are read
+    through a real io.BufferedReader, which line-delimited event streams need.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.channel.recv(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def makefile(self, mode="rb", buffering=None):
+        return io.BufferedReader(self)
+
+    def sendall(self, data):
+        self.channel.sendall(data)
+
+    def settimeout(self, timeout):
+        self.channel.settimeout(timeout)
+
+    def close(self):
+        # http.client closes the response file, not the connection, after each reply
+        pass
+
+    def shutdown(self):
+        self.channel.close()
+
+
+class DockerChannelConnection(http.client.HTTPConnection):
+    """
+    HTTP/1.1 keep-alive connection whose socket is an SSH exec channel running
+    DOCKER_DIAL_COMMAND, opened on a pooled SSH transport.
+    """
+
+    def __init__(self, pool, host, port, username, password, dial_command=DOCKER_DIAL_COMMAND, timeout=30):
+        super().__init__("docker", timeout=timeout)
+        self.pool = pool
+        self.ssh_args = (host, port, username, password)
+        self.dial_command = dial_command
+
+    def connect(self):
+        # Keep the file objects: a collected stdin file would shut the channel's write side
+        self._channel_files = self.pool.open_channel(*self.ssh_args, self.dial_command)
+        self.sock = _ChannelSocket(self._channel_files[1].channel)
+        self.sock.settimeout(self.timeout)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.shutdown()
+        super().close()
+
+
+# --- Engine API Client ---
+class DockerClient:
+    """
+    Minimal Docker Engine API client over SSH. Requests reuse a small set of keep-alive
+    connections (one SSH channel each), so concurrent batch operations don't queue
+    behind each other and no request pays for a new SSH login.
+    """
+
+    def __init__(self, pool, host, port, username, password, max_connections=8, dial_command=DOCKER_DIAL_COMMAND):
+        self.pool = pool
+        self.ssh_args = (host, port, username, password)
+        self.dial_command = dial_command
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+
+    def _connection(self, timeout=30):
+        return DockerChannelConnection(self.pool, *self.ssh_args, dial_command=self.dial_command, timeout=timeout)
+
+    def request(self, method, path, params=None, body=None, timeout=30):
+        """Sends one API request and returns the decoded JSON body (None if empty)."""
+        url = path + (f"?{urlencode(params)}" if params else "")
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+
+        with self._slots:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            for attempt in range(2):
+                reused = conn is not None
+                conn = conn or self._connection(timeout)
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                sent = False
+                try:
+                    conn.request(method, url, body=payload, headers=headers)
+                    sent = True
+                    response = conn.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, paramiko.SSHException, EOFError, OSError):
+                    conn.close()
+                    conn = None
+                    # A stale keep-alive channel gets one retry, unless a non-GET may already have run
+                    if attempt or not reused or (sent and method != "GET"):
+                        raise
+            with self._lock:
+                self._idle.append(conn)
+
+        if response.status >= 400:
+            try:
+                message = json.loads(data).get("message", "")
+            except ValueError:
+                message = data.decode("utf-8", "replace")
+            raise DockerAPIError(response.status, message)
+        if not data:
+            return None
+        if response.getheader("Content-Type", "").startswith("application/json"):
+            try:
+                return json.loads(data)
+            except ValueError:
+                # Progress streams (pull) are newline-delimited JSON objects
+                return [json.loads(line) for line in data.splitlines() if line.strip()]
+        return data.decode("utf-8", "replace")
+
+    def events(self, since=None, filters=None):
+        """
+        Yields decoded events from the `/events` stream on a dedicated connection,
+        until the caller stops iterating or the stream breaks.
+        """
+        params = {}
+        if since is not None:
+            params["since"] = str(int(since))
+        if filters:
+            params["filters"] = json.dumps(filters)
+        conn = self._connection(timeout=None)
+        try:
+            conn.request("GET", "/events" + (f"?{urlencode(params)}" if params else ""))
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise DockerAPIError(response.status, response.read().decode("utf-8", "replace"))
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    # --- Endpoints ---
+    def version(self):
+        return self.request("GET", "/version")
+
+    def containers(self, all=True, filters=None):
+        params = {"all": "1" if all else "0"}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        return self.request("GET", "/containers/json", params)
+
+    def images(self):
+        return self.request("GET", "/images/json")
+
+    def pull(self, image):
+        name, _, tag = image.rpartition(":") if ":" in image.rsplit("/", 1)[-1] else (image, "", "latest")
+        progress = self.request("POST", "/images/create", {"fromImage": name, "tag": tag or "latest"}, timeout=600)
+        # A failed pull still answers 200; the error is in the last progress message
+        errors = [p["error"] for p in progress or [] if isinstance(p, dict) and "error" in p]
+        if errors:
+            raise DockerAPIError(500, errors[-1])
+        return progress
+
+    def run(self, image, command=None, name=None):
+        """Creates and starts a detached container; returns its id."""
+        body = {"Image": image}
+        if command:
+            body["Cmd"] = shlex.split(command)
+        created = self.request("POST", "/containers/create", {"name": name} if name else None, body)
+        self.request("POST", f"/containers/{quote(created['Id'])}/start")
+        return created["Id"]
+
+    def stop(self, container, timeout=10):
+        return self.request("POST", f"/containers/{quote(container)}/stop", {"t": timeout}, timeout=timeout + 30)
+
+    def remove(self, container, force=False):
+        return self.request("DELETE", f"/containers/{quote(container)}", {"force": "1" if force else "0"})
+
+    def remove_image(self, image):
+        return self.request("DELETE", f"/images/{quote(image)}")
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+# --- Event-Driven Listing Cache ---
+class DockerStateCache:
+    """
+    Local copy of the container and image lists. Listed once, then kept current from
+    the `/events` stream by a background thread instead of being re-polled.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._containers = {}
+        self._images = {}
+        self.error = None
+        self.generation = 0  # Number of events applied so far
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="docker-events", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _reload(self):
+        containers = {c["Id"]: c for c in self.client.containers(all=True)}
+        images = {i["Id"]: i for i in self.client.images()}
+        with self._lock:
+            self._containers, self._images = containers, images
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Events from before the listing are replayed, so nothing slips in between
+            since = time.time() - 1
+            try:
+                self._reload()
+                self.error = None
+                self._ready.set()
+                for event in self.client.events(since=since, filters={"type": ["container", "image"]}):
+                    if self._stop.is_set():
+                        return
+                    self._apply(event)
+                    with self._changed:
+                        self.generation += 1
+                        self._changed.notify_all()
+            except Exception as e:
+                self.error = str(e)
+                self._ready.set()
+            # The stream broke (or listing failed): start over after a short pause
+            self._stop.wait(5)
+
+    def _apply(self, event):
+        kind, action = event.get("Type"), event.get("Action", "")
+        object_id = event.get("Actor", {}).get("ID") or event.get("id")
+        if kind == "container":
+            if action == "destroy":
+                with self._lock:
+                    self._containers.pop(object_id, None)
+                return
+            # One filtered lookup refreshes just the container that changed
+            for container in self.client.containers(all=True, filters={"id": [object_id]}):
+                with self._lock:
+                    self._containers[container["Id"]] = container
+        elif kind == "image" and action in ("pull", "tag", "untag", "delete", "import", "load"):
+            images = {i["Id"]: i for i in self.client.images()}
+            with self._lock:
+                self._images = images
+
+    def wait_for_events(self, after, count=1, timeout=2):
+        """
+        Waits until `count` events beyond generation `after` have been applied, so a
+        listing right after our own change already reflects it.
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.generation >= after + count, timeout)
+
+    def containers(self, timeout=30):
+        self._ready.wait(timeout)
+        with self._lock:
+            return list(self._containers.values())
+
+    def images(self, timeout=30):
+        self._ready.wait(timeout)
+        with self._lock:
+            return list(self._images.values())
@@ -1,4 +1,10 @@
-import paramiko
+import atexit
+import fnmatch
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from ssh_pool import SSHConnectionPool
+from docker_api import DockerClient, DockerStateCache
 
 # SSH login details
 hostname = input("Enter Linux IP or hostname: ")
@@ -6,22 +12,132 @@ port = 22
 username = input("Enter SSH username (e.g., root): ")
 password = input("Enter SSH password: ")
 
-def execute_command(command):
+# One SSH session for the whole menu; the Docker API is reached over channels on it
+pool = SSHConnectionPool()
+docker = DockerClient(pool, hostname, port, username, password)
+state = None  # Container/image cache, started on first listing
+atexit.register(pool.close_all)
+atexit.register(docker.close)
+
+MAX_PARALLEL_ACTIONS = 8
+
+def get_state():
+    global state
+    if state is None:
+        state = DockerStateCache(docker).start()
+    return state
+
+def print_table(rows, columns):
+    """Prints dicts as aligned columns."""
+    if not rows:
+        print("(none)")
+        return
+    widths = [max(len(col), *(len(str(row.get(col, ""))) for row in rows)) for col in columns]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row.get(col, "")).ljust(w) for col, w in zip(columns, widths)))
+
+def container_rows(containers):
+    return [{
+        "ID": c["Id"][:12],
+        "NAME": ",".join(n.lstrip("/") for n in c.get("Names", [])),
+        "IMAGE": c.get("Image", ""),
+        "STATE": c.get("State", ""),
+        "STATUS": c.get("Status", ""),
+    } for c in sorted(containers, key=lambda c: c.get("Created", 0), reverse=True)]
+
+def image_rows(images):
+    return [{
+        "ID": i["Id"].split(":")[-1][:12],
+        "TAGS": ",".join(i.get("RepoTags") or ["<none>"]),
+        "SIZE (MB)": f"{i.get('Size', 0) / 1e6:.1f}",
+        "CREATED": datetime.fromtimestamp(i.get("Created", 0)).strftime("%Y-%m-%d %H:%M"),
+    } for i in sorted(images, key=lambda i: i.get("Created", 0), reverse=True)]
+
+def run_action(label, action, *args):
     try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(hostname, port, username, password)
-
-        stdin, stdout, stderr = ssh.exec_command(command)
-        print("🔧 Output:\n")
-        print(stdout.read().decode())
-        err = stderr.read().decode()
-        if err:
-            print("⚠️ Error:\n", err)
-
-        ssh.close()
+        result = action(*args)
+        print(f"✅ {label}")
+        return result
     except Exception as e:
-        print("❌ Connection failed:", str(e))
+        print(f"❌ {label} failed:", str(e))
+        return False
+
+def run_change(label, action, *args):
+    """Runs a mutating action, then lets the event stream catch up so the next listing includes it."""
+    generation = state.generation if state else None
+    result = run_action(label, action, *args)
+    if state and result is not False:
+        state.wait_for_events(generation)
+    return result
+
+def show_listing(kind, running_only=False):
+    cache = get_state()
+    rows = cache.images() if kind == "images" else cache.containers()
+    if cache.error:
+        print("❌ Docker API unavailable:", cache.error)
+        return
+    if kind == "images":
+        print_table(image_rows(rows), ["ID", "TAGS", "SIZE (MB)", "CREATED"])
+    else:
+        if running_only:
+            rows = [c for c in rows if c.get("State") == "running"]
+        print_table(container_rows(rows), ["ID", "NAME", "IMAGE", "STATE", "STATUS"])
+
+# --- Batch Mode ---
+def resolve_targets(patterns, action):
+    """
+    Expands comma-separated names/IDs/glob patterns (e.g. `web-*`) against the cached listings.
+    Names match exactly or by glob; an ID prefix only counts if it is unique, as with docker itself.
+    """
+    if action == "pull":
+        return patterns
+    containers = get_state().containers()
+    targets = []
+    for pattern in patterns:
+        matches = [c["Id"] for c in containers
+                   if any(fnmatch.fnmatchcase(n.lstrip("/"), pattern) for n in c.get("Names", []))]
+        if not matches:
+            by_id = [c["Id"] for c in containers if c["Id"].startswith(pattern)]
+            if len(by_id) > 1:
+                print(f"⚠️ Skipping '{pattern}': ID prefix matches {len(by_id)} containers.")
+                continue
+            matches = by_id
+        targets.extend(matches or [pattern])
+    return list(dict.fromkeys(targets))
+
+def target_label(target):
+    """Container name for a resolved ID, so the confirmation shows what will be touched."""
+    for c in get_state().containers():
+        if c["Id"] == target:
+            return f"{target[:12]} ({','.join(n.lstrip('/') for n in c.get('Names', []))})"
+    return target
+
+def batch_mode():
+    actions = {"stop": docker.stop, "rm": docker.remove, "pull": docker.pull}
+    action = input("Action (stop / rm / pull): ").strip()
+    if action not in actions:
+        print("❌ Unknown action.")
+        return
+    patterns = [p.strip() for p in input("Containers or images (comma-separated, globs allowed): ").split(",") if p.strip()]
+    targets = resolve_targets(patterns, action)
+    if not targets:
+        print("❌ Nothing to do.")
+        return
+
+    print(f"Targets for {action}:")
+    for target in targets:
+        print("  -", target_label(target) if action != "pull" else target)
+    if input(f"Proceed with {action} on {len(targets)} target(s)? [y/N]: ").strip().lower() != "y":
+        print("❌ Cancelled.")
+        return
+
+    print(f"🔧 {action} on {len(targets)} target(s)...")
+    generation = state.generation if state else None
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL_ACTIONS) as executor:
+        results = list(executor.map(lambda t: run_action(f"{action} {t[:12]}", actions[action], t) is not False, targets))
+    if state:
+        state.wait_for_events(generation, count=sum(results))
 
 def show_menu():
     while True:
@@ -36,36 +152,43 @@ def show_menu():
 7. Stop Docker Container
 8. Remove Docker Container
 9. Remove Docker Image
-10. Exit
+10. Batch Mode (stop / rm / pull many)
+11. Exit
 ===========================================
         """)
         choice = input("Enter your choice: ")
 
         if choice == "1":
-            execute_command("docker --version")
+            version = run_action("Version", docker.version)
+            if version:
+                print(json.dumps({k: version.get(k) for k in ("Version", "ApiVersion", "Os", "Arch", "KernelVersion")}, indent=2))
         elif choice == "2":
-            execute_command("docker images")
+            show_listing("images")
         elif choice == "3":
-            execute_command("docker ps")
+            show_listing("containers", running_only=True)
         elif choice == "4":
-            execute_command("docker ps -a")
+            show_listing("containers")
         elif choice == "5":
             img = input("Enter image name (e.g., ubuntu:latest): ")
-            execute_command(f"docker pull {img}")
+            run_change(f"Pulled {img}", docker.pull, img)
         elif choice == "6":
             img = input("Image name to run: ")
-            cmd = input("Command to run inside container (e.g., bash): ")
-            execute_command(f"docker run -it {img} {cmd}")
+            cmd = input("Command to run inside container (optional): ")
+            container_id = run_change(f"Started {img} (detached)", docker.run, img, cmd or None)
+            if container_id:
+                print("🆔", container_id[:12])
         elif choice == "7":
             cid = input("Enter container ID or name to stop: ")
-            execute_command(f"docker stop {cid}")
+            run_change(f"Stopped {cid}", docker.stop, cid)
         elif choice == "8":
             cid = input("Enter container ID or name to remove: ")
-            execute_command(f"docker rm {cid}")
+            run_change(f"Removed {cid}", docker.remove, cid)
         elif choice == "9":
             img = input("Enter image name to remove: ")
-            execute_command(f"docker rmi {img}")
+            run_change(f"Removed image {img}", docker.remove_image, img)
         elif choice == "10":
+            batch_mode()
+        elif choice == "11":
             print("✅ Exiting... Goodbye!")
             break
         else:
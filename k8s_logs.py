@@ -0,0 +1,162 @@
+# k8s_logs.py
+
+import itertools
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+# --- Log Levels ---
+LEVELS = ["TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL"]
+LEVEL_PATTERN = re.compile(r"\b(TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|ERR|FATAL|CRITICAL|PANIC)\b", re.IGNORECASE)
+LEVEL_ALIASES = {"WARNING": "WARN", "ERR": "ERROR", "CRITICAL": "FATAL", "PANIC": "FATAL"}
+
+def detect_level(line):
+    match = LEVEL_PATTERN.search(line)
+    if not match:
+        return None
+    level = match.group(1).upper()
+    return LEVEL_ALIASES.get(level, level)
+
+# Shared across streams so merged views keep arrival order
+_sequence = itertools.count()
+
+
+# --- Follow-Mode Stream ---
+class PodLogStream:
+    """
+    Follows one pod's logs (`kubectl logs -f`) on a background thread into a bounded
+    ring buffer of (seq, level, line). Lines without a level (stack traces, wrapped
+    JSON) inherit the previous line's level, so filtering keeps them with their entry.
+    kubectl exits when a container restarts or finishes; the stream then re-follows with
+    a growing delay, from `--since-time` of the exit so nothing is replayed. A watchdog
+    stops the process once nobody has read the stream for `idle_timeout` seconds.
+    """
+
+    def __init__(self, namespace, pod, container=None, context=None, tail=200, max_lines=2000, idle_timeout=300,
+                 retry_delay=1, max_retry_delay=60):
+        self.namespace, self.pod, self.container, self.context = namespace, pod, container, context
+        self.tail = tail
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.error = None
+        self.total_lines = 0
+        self.restarts = 0
+        self._lines = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self._process = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._went_idle = False
+        self._last_read = time.time()
+
+    @property
+    def label(self):
+        return f"{self.namespace}/{self.pod}" + (f"/{self.container}" if self.container else "")
+
+    def _command(self, since_time=None):
+        command = ["kubectl", "logs", "-f", self.pod, "-n", self.namespace]
+        command += [f"--since-time={since_time}"] if since_time else [f"--tail={self.tail}"]
+        command += ["-c", self.container] if self.container else ["--all-containers=true", "--prefix=true"]
+        if self.context:
+            command += ["--context", self.context]
+        return command
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_running(self):
+        """Starts following, or restarts a stream that was stopped for being idle."""
+        self._last_read = time.time()
+        if self._thread is None or (self._went_idle and not self.running):
+            if self._thread is not None:
+                # The restarted process replays the tail, so drop what it will send again
+                with self._lock:
+                    self._lines.clear()
+            self.error = None
+            self._went_idle = False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"logs-{self.pod}", daemon=True)
+            self._thread.start()
+            threading.Thread(target=self._watchdog, name=f"logs-idle-{self.pod}", daemon=True).start()
+        return self
+
+    def _watchdog(self):
+        # Checked on a timer, so a pod that logs nothing is stopped too
+        while not self._stop.wait(min(self.idle_timeout, 10)):
+            if time.time() - self._last_read > self.idle_timeout:
+                self._went_idle = True
+                self.stop()
+
+    def _follow(self, since_time):
+        """Runs one kubectl process until it exits; returns its exit code."""
+        self._process = subprocess.Popen(
+            self._command(since_time), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace"
+        )
+        level = None
+        for line in self._process.stdout:
+            line = line.rstrip("\n")
+            level = detect_level(line) or level
+            with self._lock:
+                self._lines.append((next(_sequence), level, line))
+                self.total_lines += 1
+        returncode = self._process.wait()
+        if returncode != 0 and not self._stop.is_set():
+            self.error = self._process.stderr.read().strip() or f"kubectl logs exited with {returncode}"
+        elif returncode == 0:
+            self.error = None
+        return returncode
+
+    def _run(self):
+        since_time, delay = None, self.retry_delay
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self._follow(since_time)
+            except OSError as e:
+                self.error = str(e)
+            # Resume from where this process ended once the container is back
+            since_time = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            # A process that followed for a while ended normally (restart, rollout); retry promptly
+            delay = self.retry_delay if time.time() - started > self.max_retry_delay else min(delay * 2, self.max_retry_delay)
+            if self._stop.wait(delay):
+                break
+            self.restarts += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+
+    def lines(self):
+        """Returns a copy of the buffered (seq, level, line) entries and marks the stream as read."""
+        self._last_read = time.time()
+        with self._lock:
+            return list(self._lines)
+
+
+# --- Filtering ---
+def filter_lines(streams, pattern=None, min_level=None, limit=500):
+    """
+    Merges the buffers of several streams in arrival order and keeps only lines that
+    match `pattern` (a compiled regex) and are at least `min_level`. Runs on the server,
+    so only the last `limit` matching lines are ever sent to the browser.
+    Returns (lines, matched count).
+    """
+    threshold = LEVELS.index(min_level) if min_level else None
+    merged = []
+    for stream in streams:
+        prefix = f"[{stream.pod}] " if len(streams) > 1 else ""
+        for seq, level, line in stream.lines():
+            if threshold is not None and (level is None or LEVELS.index(level) < threshold):
+                continue
+            if pattern is not None and not pattern.search(line):
+                continue
+            merged.append((seq, prefix + line))
+    merged.sort()
+    return [line for _, line in merged[-limit:]], len(merged)
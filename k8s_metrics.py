@@ -0,0 +1,123 @@
+# k8s_metrics.py
+
+import json
+import re
+import subprocess
+import threading
+import time
+from collections import defaultdict
+
+# --- Resource Quantities ---
+QUANTITY_PATTERN = re.compile(r"^([+-]?[0-9.]+(?:[eE][+-]?[0-9]+)?)([a-zA-Z]*)$")
+QUANTITY_SUFFIXES = {
+    "": 1, "n": 1e-9, "u": 1e-6, "m": 1e-3,
+    "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+    "Ki": 2 ** 10, "Mi": 2 ** 20, "Gi": 2 ** 30, "Ti": 2 ** 40, "Pi": 2 ** 50, "Ei": 2 ** 60,
+}
+
+def parse_quantity(quantity):
+    """Converts a Kubernetes quantity ("250m", "1024Ki", "1500000n") to a float in base units."""
+    match = QUANTITY_PATTERN.match(str(quantity).strip())
+    if not match or match.group(2) not in QUANTITY_SUFFIXES:
+        raise ValueError(f"unrecognised quantity: {quantity!r}")
+    return float(match.group(1)) * QUANTITY_SUFFIXES[match.group(2)]
+
+METRICS_PATHS = {
+    "nodes": "/apis/metrics.k8s.io/v1beta1/nodes",
+    "pods": "/apis/metrics.k8s.io/v1beta1/pods",
+}
+
+
+# --- metrics-server Sampler ---
+class KubeMetricsSampler:
+    """
+    Polls metrics-server (the data behind `kubectl top`) every `interval` seconds on a
+    background thread. Node usage and per-namespace pod usage totals are appended to a
+    MetricStore under (context, "node" | "namespace", name, "cpu" | "memory") keys, CPU
+    in cores and memory in bytes; the latest per-pod usage is kept only as a snapshot.
+    """
+
+    def __init__(self, store, context=None, interval=15, kubectl="kubectl", timeout=30):
+        self.store = store
+        self.context = context
+        self.interval = interval
+        self.kubectl = kubectl
+        self.timeout = timeout
+        self.error = None
+        self.sampled_at = None
+        self.nodes = []  # Latest [{"Node", "CPU (cores)", "Memory (bytes)"}]
+        self.pods = []  # Latest [{"Namespace", "Pod", "CPU (cores)", "Memory (bytes)"}]
+        self._sampled = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"metrics-{context or 'current'}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _get(self, kind):
+        command = [self.kubectl, "get", "--raw", METRICS_PATHS[kind]]
+        if self.context:
+            command += ["--context", self.context]
+        result = subprocess.run(command, capture_output=True, text=True, timeout=self.timeout)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"kubectl exited with {result.returncode}")
+        return json.loads(result.stdout).get("items", [])
+
+    def sample(self):
+        """Takes one sample of every node and pod and records it; returns the sample time."""
+        node_items, pod_items = self._get("nodes"), self._get("pods")
+        timestamp = time.time()
+
+        nodes = [{
+            "Node": item["metadata"]["name"],
+            "CPU (cores)": parse_quantity(item["usage"].get("cpu", 0)),
+            "Memory (bytes)": parse_quantity(item["usage"].get("memory", 0)),
+        } for item in node_items]
+
+        pods = []
+        namespaces = defaultdict(lambda: [0.0, 0.0])
+        for item in pod_items:
+            containers = item.get("containers", [])
+            cpu = sum(parse_quantity(c["usage"].get("cpu", 0)) for c in containers)
+            memory = sum(parse_quantity(c["usage"].get("memory", 0)) for c in containers)
+            namespace = item["metadata"].get("namespace", "")
+            pods.append({"Namespace": namespace, "Pod": item["metadata"]["name"], "CPU (cores)": cpu, "Memory (bytes)": memory})
+            namespaces[namespace][0] += cpu
+            namespaces[namespace][1] += memory
+
+        for row in nodes:
+            self._record("node", row["Node"], timestamp, row["CPU (cores)"], row["Memory (bytes)"])
+        for namespace, (cpu, memory) in namespaces.items():
+            self._record("namespace", namespace, timestamp, cpu, memory)
+
+        self.nodes, self.pods = nodes, pods
+        self.sampled_at = timestamp
+        return timestamp
+
+    def _record(self, group, name, timestamp, cpu, memory):
+        self.store.series((self.context, group, name, "cpu")).append([timestamp], [cpu])
+        self.store.series((self.context, group, name, "memory")).append([timestamp], [memory])
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self.sample()
+                self.error = None
+            except Exception as e:
+                # Usually metrics-server missing or not ready yet; keep polling so it's picked up later
+                self.error = str(e)
+            self._sampled.set()
+            self._stop.wait(max(self.interval - (time.time() - started), 0))
+
+    def wait_for_sample(self, timeout=30):
+        """Waits up to `timeout` for the first sampling attempt (successful or not) to finish."""
+        return self._sampled.wait(timeout)
+
+    def series_keys(self, group):
+        """Names recorded so far for `group` ("node" or "namespace") in this context."""
+        return sorted({key[2] for key in self.store.keys() if key[0] == self.context and key[1] == group})
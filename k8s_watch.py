@@ -0,0 +1,213 @@
+# k8s_watch.py
+
+import json
+import subprocess
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+# --- Resource Kinds ---
+RESOURCE_PATHS = {
+    "pods": "/api/v1/pods",
+    "nodes": "/api/v1/nodes",
+    "services": "/api/v1/services",
+    "deployments": "/apis/apps/v1/deployments",
+}
+LIST_PAGE_SIZE = 500  # Paged so a huge first list doesn't have to be built in one response
+
+def _created(obj):
+    stamp = obj["metadata"].get("creationTimestamp")
+    return datetime.fromisoformat(stamp.replace("Z", "+00:00")) if stamp else None
+
+def pod_row(pod):
+    statuses = pod.get("status", {}).get("containerStatuses", [])
+    status = pod.get("status", {}).get("phase", "Unknown")
+    for container in statuses:
+        waiting = container.get("state", {}).get("waiting")
+        if waiting and waiting.get("reason"):
+            status = waiting["reason"]
+    if pod["metadata"].get("deletionTimestamp"):
+        status = "Terminating"
+    return {
+        "Namespace": pod["metadata"].get("namespace", ""),
+        "Name": pod["metadata"]["name"],
+        "Ready": f"{sum(c.get('ready', False) for c in statuses)}/{len(pod.get('spec', {}).get('containers', []))}",
+        "Status": status,
+        "Restarts": sum(c.get("restartCount", 0) for c in statuses),
+        "Created": _created(pod),
+        "IP": pod.get("status", {}).get("podIP", ""),
+        "Node": pod.get("spec", {}).get("nodeName", ""),
+    }
+
+def node_row(node):
+    conditions = {c["type"]: c["status"] for c in node.get("status", {}).get("conditions", [])}
+    labels = node["metadata"].get("labels", {})
+    roles = [key.split("/", 1)[1] for key in labels if key.startswith("node-role.kubernetes.io/")]
+    addresses = {a["type"]: a["address"] for a in node.get("status", {}).get("addresses", [])}
+    return {
+        "Name": node["metadata"]["name"],
+        "Status": "Ready" if conditions.get("Ready") == "True" else "NotReady",
+        "Roles": ",".join(roles) or "<none>",
+        "Created": _created(node),
+        "Version": node.get("status", {}).get("nodeInfo", {}).get("kubeletVersion", ""),
+        "Internal IP": addresses.get("InternalIP", ""),
+    }
+
+def service_row(service):
+    spec = service.get("spec", {})
+    ingress = service.get("status", {}).get("loadBalancer", {}).get("ingress", [])
+    external = [i.get("ip") or i.get("hostname", "") for i in ingress] + spec.get("externalIPs", [])
+    ports = [f"{p.get('port')}{':' + str(p['nodePort']) if p.get('nodePort') else ''}/{p.get('protocol', 'TCP')}"
+             for p in spec.get("ports", [])]
+    return {
+        "Namespace": service["metadata"].get("namespace", ""),
+        "Name": service["metadata"]["name"],
+        "Type": spec.get("type", ""),
+        "Cluster IP": spec.get("clusterIP", ""),
+        "External IP": ",".join(external) or "<none>",
+        "Ports": ",".join(ports),
+        "Created": _created(service),
+    }
+
+def deployment_row(deployment):
+    status = deployment.get("status", {})
+    return {
+        "Namespace": deployment["metadata"].get("namespace", ""),
+        "Name": deployment["metadata"]["name"],
+        "Ready": f"{status.get('readyReplicas', 0)}/{deployment.get('spec', {}).get('replicas', 0)}",
+        "Up-to-date": status.get("updatedReplicas", 0),
+        "Available": status.get("availableReplicas", 0),
+        "Created": _created(deployment),
+    }
+
+ROW_BUILDERS = {"pods": pod_row, "nodes": node_row, "services": service_row, "deployments": deployment_row}
+
+
+# --- Informer-Style Cache ---
+class KubeWatchCache:
+    """
+    Local copy of one resource kind, kept current like a client-go informer: a single
+    paged list seeds it, then a watch from the list's resourceVersion streams changes.
+    A broken watch resumes from the last seen version; an expired one (410) relists.
+    Rows are built once per change, so reading the table costs nothing per click.
+    """
+
+    def __init__(self, kind, context=None, kubectl="kubectl", retry_delay=5, max_retry_delay=60, list_timeout=60):
+        self.kind = kind
+        self.path = RESOURCE_PATHS[kind]
+        self.context = context
+        self.kubectl = kubectl
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.list_timeout = list_timeout
+        self.error = None
+        self.synced_at = None
+        self._rows = {}  # (namespace, name) -> row
+        self._version = None
+        self._process = None
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watch-{kind}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._process:
+            self._process.terminate()
+
+    def _command(self, url):
+        # An argument list, not a shell string: nothing in the URL is interpreted
+        command = [self.kubectl, "get", "--raw", url]
+        if self.context:
+            command += ["--context", self.context]
+        return command
+
+    def _list(self):
+        rows, token = {}, None
+        while True:
+            url = f"{self.path}?limit={LIST_PAGE_SIZE}" + (f"&continue={quote(token)}" if token else "")
+            result = subprocess.run(self._command(url), capture_output=True, text=True, timeout=self.list_timeout)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"kubectl exited with {result.returncode}")
+            page = json.loads(result.stdout)
+            for obj in page.get("items", []):
+                rows[self._key(obj)] = ROW_BUILDERS[self.kind](obj)
+            token = page["metadata"].get("continue")
+            if not token:
+                with self._lock:
+                    self._rows = rows
+                self._version = page["metadata"]["resourceVersion"]
+                return
+
+    @staticmethod
+    def _key(obj):
+        return obj["metadata"].get("namespace", ""), obj["metadata"]["name"]
+
+    def _watch(self):
+        """Applies watch events until the stream ends; returns False if a relist is needed."""
+        url = f"{self.path}?watch=1&allowWatchBookmarks=true&resourceVersion={self._version}"
+        self._process = subprocess.Popen(self._command(url), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            for line in self._process.stdout:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                obj = event["object"]
+                if event["type"] == "ERROR":
+                    # 410 Gone: our resourceVersion is too old to resume from
+                    return obj.get("code") != 410
+                self._version = obj["metadata"]["resourceVersion"]
+                if event["type"] == "BOOKMARK":
+                    continue
+                key = self._key(obj)
+                with self._lock:
+                    if event["type"] == "DELETED":
+                        self._rows.pop(key, None)
+                    else:
+                        self._rows[key] = ROW_BUILDERS[self.kind](obj)
+            if self._process.wait() != 0 and not self._stop.is_set():
+                raise RuntimeError(self._process.stderr.read().strip() or "watch ended with an error")
+            return True
+        finally:
+            self._process.kill()
+            self._process.wait()
+
+    def _run(self):
+        needs_list = True
+        delay = self.retry_delay
+        while not self._stop.is_set():
+            try:
+                if needs_list:
+                    self._list()
+                    self.synced_at = time.time()
+                    self.error = None
+                    self._synced.set()
+                    delay = self.retry_delay
+                # Watches end normally after the server's timeout; resume from the last version
+                started = time.time()
+                needs_list = not self._watch()
+                if time.time() - started < 1:
+                    self._stop.wait(1)  # Don't spin on a watch that keeps closing straight away
+            except Exception as e:
+                self.error = str(e)
+                self._synced.set()
+                needs_list = True
+                # Back off so an unreachable cluster isn't hammered with kubectl runs
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+
+    def rows(self, timeout=30):
+        """Returns the cached rows, waiting up to `timeout` for the first list."""
+        self._synced.wait(timeout)
+        with self._lock:
+            return list(self._rows.values())
+
+    @property
+    def synced(self):
+        """True once a list has completed (the rows may still be from before a later error)."""
+        return self.synced_at is not None
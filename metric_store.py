@@ -0,0 +1,212 @@
+# metric_store.py
+
+import hashlib
+import os
+import threading
+import numpy as np
+
+# --- Ring-Buffer Series ---
+class RingSeries:
+    """
+    Fixed-capacity time-series held in two float64 NumPy arrays (timestamps, values).
+    Once full, the oldest samples are overwritten.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0  # Next write position
+        self._size = 0
+        self.covered_from = None  # Earliest time a fetch has asked for; the source may have had nothing that old
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def first_timestamp(self):
+        """Returns the oldest timestamp, or None if the series is empty."""
+        with self._lock:
+            if self._size == 0:
+                return None
+            return float(self.timestamps[(self._head - self._size) % self.capacity])
+
+    def last_timestamp(self):
+        """Returns the newest timestamp, or None if the series is empty."""
+        with self._lock:
+            if self._size == 0:
+                return None
+            return float(self.timestamps[(self._head - 1) % self.capacity])
+
+    def append(self, timestamps, values):
+        """Appends samples in time order; samples not newer than the last one are ignored."""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        with self._lock:
+            if self._size:
+                last = self.timestamps[(self._head - 1) % self.capacity]
+                newer = timestamps > last
+                timestamps, values = timestamps[newer], values[newer]
+            count = len(timestamps)
+            if count == 0:
+                return 0
+            # Only the newest `capacity` samples can survive the write
+            if count > self.capacity:
+                timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+            n = len(timestamps)
+            positions = (self._head + np.arange(n)) % self.capacity
+            self.timestamps[positions] = timestamps
+            self.values[positions] = values
+            self._head = (self._head + n) % self.capacity
+            self._size = min(self._size + n, self.capacity)
+            self._written()
+            return count
+
+    def merge(self, timestamps, values):
+        """
+        Inserts samples at any point in time (e.g. a back-fill of older history). A merged
+        sample replaces a stored one with the same timestamp; only the newest `capacity` are kept.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(timestamps) == 0:
+            return 0
+        with self._lock:
+            order = (self._head - self._size + np.arange(self._size)) % self.capacity
+            # np.unique keeps the first occurrence, so merged samples win over stored ones
+            all_ts = np.concatenate((timestamps, self.timestamps[order]))
+            all_values = np.concatenate((values, self.values[order]))
+            all_ts, first = np.unique(all_ts, return_index=True)
+            all_ts, all_values = all_ts[-self.capacity:], all_values[first][-self.capacity:]
+            n = len(all_ts)
+            self.timestamps[:n] = all_ts
+            self.values[:n] = all_values
+            self._head = n % self.capacity
+            self._size = n
+            self._written()
+            return len(timestamps)
+
+    def _written(self):
+        """Hook called under the lock after every append."""
+
+    def snapshot(self, since=None):
+        """
+        Returns (timestamps, values) in time order, optionally only samples >= since.
+        The window is located directly on the backing arrays and only it is copied out.
+        """
+        with self._lock:
+            start = (self._head - self._size) % self.capacity
+            if start + self._size <= self.capacity:
+                segments = [(start, start + self._size)]
+            else:
+                segments = [(start, self.capacity), (0, self._head)]
+
+            ts_parts, val_parts = [], []
+            for lo, hi in segments:
+                if since is not None:
+                    lo += int(np.searchsorted(self.timestamps[lo:hi], since, side="left"))
+                ts_parts.append(self.timestamps[lo:hi])
+                val_parts.append(self.values[lo:hi])
+            # concatenate always returns fresh arrays, so callers never see later overwrites
+            return np.concatenate(ts_parts), np.concatenate(val_parts)
+
+
+class MmapRingSeries(RingSeries):
+    """
+    RingSeries whose arrays live in a fixed-size memory-mapped file, so history
+    survives restarts. Layout (all float64): [head, size, timestamps..., values...].
+    """
+
+    HEADER = 2
+
+    def __init__(self, capacity, path):
+        self.capacity = int(capacity)
+        self.path = path
+        length = self.HEADER + 2 * self.capacity
+
+        # Reuse an existing ring file only if it was created with the same capacity
+        reuse = os.path.exists(path) and os.path.getsize(path) == length * 8
+        self._map = np.memmap(path, dtype=np.float64, mode="r+" if reuse else "w+", shape=(length,))
+        self.timestamps = self._map[self.HEADER:self.HEADER + self.capacity]
+        self.values = self._map[self.HEADER + self.capacity:]
+
+        self._head, self._size = int(self._map[0]), int(self._map[1])
+        if not (0 <= self._head < self.capacity and 0 <= self._size <= self.capacity):
+            self._head = self._size = 0
+        self.covered_from = None
+        self._lock = threading.Lock()
+
+    def _written(self):
+        self._map[0] = self._head
+        self._map[1] = self._size
+
+    def flush(self):
+        with self._lock:
+            self._map.flush()
+
+
+class MetricStore:
+    """
+    Thread-safe collection of RingSeries keyed by any hashable series id.
+    When `directory` is given, every series is persisted as a memory-mapped ring file.
+    """
+
+    def __init__(self, capacity, directory=None):
+        self.capacity = capacity
+        self.directory = directory
+        self._series = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path_for(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.ring")
+
+    def series(self, key):
+        """Returns the series for `key`, creating (or reopening) it if needed."""
+        with self._lock:
+            if key not in self._series:
+                if self.directory:
+                    self._series[key] = MmapRingSeries(self.capacity, self._path_for(key))
+                else:
+                    self._series[key] = RingSeries(self.capacity)
+            return self._series[key]
+
+    def keys(self):
+        with self._lock:
+            return list(self._series.keys())
+
+
+# --- Downsampling ---
+def downsample_lttb(timestamps, values, max_points):
+    """
+    Largest-Triangle-Three-Buckets downsampling. Keeps the first and last sample and,
+    for every bucket in between, the point forming the largest triangle with its neighbours.
+    """
+    n = len(timestamps)
+    if n <= max_points or max_points < 3:
+        return timestamps, values
+
+    # Bucket edges over the interior points (first and last are always kept)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    idx = np.empty(max_points, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    prev = 0
+    for b in range(max_points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average of the next bucket acts as the third triangle vertex
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        avg_t = timestamps[nlo:nhi].mean() if nhi > nlo else timestamps[-1]
+        avg_v = values[nlo:nhi].mean() if nhi > nlo else values[-1]
+
+        t, v = timestamps[lo:hi], values[lo:hi]
+        if len(t) == 0:
+            idx[b + 1] = lo
+            continue
+        area = np.abs((timestamps[prev] - avg_t) * (v - values[prev]) - (timestamps[prev] - t) * (avg_v - values[prev]))
+        prev = lo + int(np.argmax(area))
+        idx[b + 1] = prev
+
+    return timestamps[idx], values[idx]
@@ -0,0 +1,144 @@
+# node_scrape.py
+
+import re
+import threading
+import time
+
+# --- Metric Families Used by the Dashboard ---
+NODE_FAMILIES = frozenset({
+    "node_cpu_seconds_total",
+    "node_memory_MemTotal_bytes",
+    "node_memory_MemAvailable_bytes",
+    "node_filesystem_size_bytes",
+    "node_filesystem_free_bytes",
+})
+
+_LABEL_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+# --- Exposition Format Parser ---
+def parse_exposition(lines, families=NODE_FAMILIES):
+    """
+    Streams (name, labels, value) tuples out of Prometheus text-format lines, keeping
+    only the requested metric families. Families are contiguous in the format, so
+    parsing stops as soon as the last wanted family has been read.
+    """
+    remaining = set(families)
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        if not line or line[0] == "#":
+            continue
+
+        brace = line.find("{")
+        space = line.find(" ")
+        has_labels = brace != -1 and (space == -1 or brace < space)
+        name = line[:brace] if has_labels else line[:space]
+
+        if name not in families:
+            if not remaining:
+                return  # Every wanted family has been read in full
+            continue
+        remaining.discard(name)
+
+        if has_labels:
+            close = line.rfind("}")
+            labels = dict(_LABEL_PATTERN.findall(line, brace + 1, close))
+            rest = line[close + 1:]
+        else:
+            labels = {}
+            rest = line[space:]
+
+        try:
+            value = float(rest.split()[0])
+        except (IndexError, ValueError):
+            continue
+        yield name, labels, value
+
+
+def summarize_node_samples(samples):
+    """Reduces parsed node_exporter samples to the raw totals the dashboard needs."""
+    totals = {"cpu_idle": 0.0, "cpu_total": 0.0, "mem_total": None, "mem_available": None,
+              "fs_size": None, "fs_free": None}
+    for name, labels, value in samples:
+        if name == "node_cpu_seconds_total":
+            totals["cpu_total"] += value
+            if labels.get("mode") == "idle":
+                totals["cpu_idle"] += value
+        elif name == "node_memory_MemTotal_bytes":
+            totals["mem_total"] = value
+        elif name == "node_memory_MemAvailable_bytes":
+            totals["mem_available"] = value
+        elif name == "node_filesystem_size_bytes" and labels.get("mountpoint") == "/":
+            totals["fs_size"] = value
+        elif name == "node_filesystem_free_bytes" and labels.get("mountpoint") == "/":
+            totals["fs_free"] = value
+    return totals
+
+
+# --- Rates From Successive Scrapes ---
+# Byte counters turned into per-second rates when a collector reports them
+RATE_COUNTERS = {
+    "net_rx_bytes": "net_recv_bps",
+    "net_tx_bytes": "net_sent_bps",
+    "disk_read_bytes": "disk_read_bps",
+    "disk_write_bytes": "disk_write_bps",
+}
+
+class ScrapeHistory:
+    """
+    Remembers the previous counters of every scraped target so usage can be
+    computed locally as a rate between two scrapes, like PromQL's rate().
+    """
+
+    def __init__(self):
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    def usage(self, target, totals, timestamp=None):
+        """
+        Returns {"cpu_percent", "memory_percent", "root_fs_percent"} plus a rate for every
+        counter in RATE_COUNTERS present in `totals`; None where unknown.
+        """
+        timestamp = timestamp or time.time()
+        with self._lock:
+            previous = self._previous.get(target)
+            self._previous[target] = (timestamp, totals)
+
+        cpu_percent = None
+        if previous is not None:
+            prev_totals = previous[1]
+            delta_total = totals["cpu_total"] - prev_totals["cpu_total"]
+            # A counter reset (host reboot) shows up as a negative delta
+            if delta_total > 0:
+                delta_idle = totals["cpu_idle"] - prev_totals["cpu_idle"]
+                cpu_percent = (1 - delta_idle / delta_total) * 100
+
+        memory_percent = None
+        if totals["mem_total"]:
+            memory_percent = (totals["mem_total"] - (totals["mem_available"] or 0)) / totals["mem_total"] * 100
+
+        root_fs_percent = None
+        if totals["fs_size"]:
+            root_fs_percent = (totals["fs_size"] - (totals["fs_free"] or 0)) / totals["fs_size"] * 100
+
+        usage = {"cpu_percent": cpu_percent, "memory_percent": memory_percent, "root_fs_percent": root_fs_percent}
+        for counter, rate_name in RATE_COUNTERS.items():
+            if counter not in totals:
+                continue
+            usage[rate_name] = None
+            if previous is not None and counter in previous[1] and timestamp > previous[0]:
+                delta = totals[counter] - previous[1][counter]
+                if delta >= 0:
+                    usage[rate_name] = delta / (timestamp - previous[0])
+        return usage
+
+
+def scrape_node_exporter(session, url, history, timeout=5):
+    """
+    Scrapes a node_exporter `/metrics` endpoint, streaming the response through the
+    parser so unneeded families are never materialised, and returns usage percentages.
+    """
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        totals = summarize_node_samples(parse_exposition(response.iter_lines()))
+    return history.usage(url, totals)
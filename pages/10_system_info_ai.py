@@ -3,9 +3,21 @@
 import streamlit as st
 import psutil
 import platform
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.tools import Tool
 from langchain.agents import initialize_agent, AgentType
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_community.callbacks.streamlit import StreamlitCallbackHandler
+from system_sampler import SystemSampler
 
 # --- BACKEND LOGIC (LangChain Agent and Tools) ---
 
@@ -16,16 +28,31 @@ def check_api_key():
         st.info("Create a file at `/.streamlit/secrets.toml` and add your key: `GOOGLE_API_KEY = 'YOUR_KEY_HERE'`")
         st.stop()
 
+# One background sampler per server process, shared by every session and tool call
+@st.cache_resource
+def get_system_sampler():
+    """Starts the process-wide system sampler thread (once)."""
+    return SystemSampler(interval=2.0).start()
+
 # Define system information tools
 # Note: LangChain tools require a single (often unused) string argument.
 def get_cpu_info(input_str: str) -> str:
     """Returns the current CPU usage percentage."""
-    return f"CPU Usage: {psutil.cpu_percent()}%"
+    snap = get_system_sampler().snapshot()
+    if snap is None:
+        return f"CPU Usage: {psutil.cpu_percent(interval=0.5)}%"
+    per_core = ", ".join(f"{p:.0f}%" for p in snap["cpu_per_core"])
+    load1, load5, load15 = snap["load_avg"]
+    return f"CPU Usage: {snap['cpu_percent']:.1f}% (per core: {per_core}; load avg: {load1:.2f}, {load5:.2f}, {load15:.2f})"
 
 def get_memory_info(input_str: str) -> str:
     """Returns system memory statistics."""
-    mem = psutil.virtual_memory()
-    return f"RAM Stats — Total: {mem.total / (1024**3):.2f} GB, Available: {mem.available / (1024**3):.2f} GB, Used: {mem.percent}%"
+    snap = get_system_sampler().snapshot()
+    if snap is None:
+        mem = psutil.virtual_memory()
+        return f"RAM Stats — Total: {mem.total / (1024**3):.2f} GB, Available: {mem.available / (1024**3):.2f} GB, Used: {mem.percent}%"
+    return (f"RAM Stats — Total: {snap['mem_total'] / (1024**3):.2f} GB, Available: {snap['mem_available'] / (1024**3):.2f} GB, "
+            f"Used: {snap['mem_percent']}%, Swap Used: {snap['swap_percent']}%")
 
 def get_system_info(input_str: str) -> str:
     """Returns general operating system information."""
@@ -34,28 +61,278 @@ def get_system_info(input_str: str) -> str:
 
 def get_disk_info(input_str: str) -> str:
     """Returns disk usage statistics for the root directory."""
-    disk = psutil.disk_usage('/')
-    return f"Disk Usage (/) — Total: {disk.total / (1024**3):.2f} GB, Used: {disk.used / (1024**3):.2f} GB, Free: {disk.free / (1024**3):.2f} GB"
+    snap = get_system_sampler().snapshot()
+    if snap is None:
+        disk = psutil.disk_usage('/')
+        return f"Disk Usage (/) — Total: {disk.total / (1024**3):.2f} GB, Used: {disk.used / (1024**3):.2f} GB, Free: {disk.free / (1024**3):.2f} GB"
+    return (f"Disk Usage (/) — Total: {snap['disk_total'] / (1024**3):.2f} GB, Used: {snap['disk_used'] / (1024**3):.2f} GB, "
+            f"Free: {snap['disk_free'] / (1024**3):.2f} GB, I/O: {snap['disk_read_bps'] / (1024**2):.2f} MB/s read, "
+            f"{snap['disk_write_bps'] / (1024**2):.2f} MB/s write")
+
+def get_network_info(input_str: str) -> str:
+    """Returns current network throughput."""
+    snap = get_system_sampler().snapshot()
+    if snap is None:
+        return "Network stats are not available yet; please try again in a moment."
+    return f"Network — Sent: {snap['net_sent_bps'] / 1024:.1f} KB/s, Received: {snap['net_recv_bps'] / 1024:.1f} KB/s"
+
+def get_process_info(input_str: str) -> str:
+    """Returns the processes using the most CPU and memory."""
+    top = get_system_sampler().processes()
+    if top is None:
+        return "Process stats are not available yet; please try again in a moment."
+    by_cpu = ", ".join(f"{p['name']} (PID {p['pid']}): {p['cpu_percent']:.1f}%" for p in top["by_cpu"])
+    by_memory = ", ".join(f"{p['name']} (PID {p['pid']}): {p['memory_percent']:.1f}%" for p in top["by_memory"])
+    return f"Top CPU — {by_cpu}\nTop Memory — {by_memory}"
+
+def get_system_snapshot(input_str: str) -> str:
+    """
+    Returns CPU, memory, disk, network, OS and top processes in one compact JSON
+    document, collected concurrently, so broad questions need a single tool call.
+    """
+    sampler = get_system_sampler()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        metrics_future = pool.submit(sampler.snapshot)
+        uname_future = pool.submit(platform.uname)
+        processes_future = pool.submit(sampler.processes)
+        snap, uname, top = metrics_future.result(), uname_future.result(), processes_future.result()
+
+    gb = 1024 ** 3
+    summary = {"os": {"system": uname.system, "node": uname.node, "release": uname.release, "machine": uname.machine}}
+    if top:
+        summary["processes"] = {
+            "count": top["total"],
+            "top_cpu": [[p["name"], p["pid"], round(p["cpu_percent"], 1)] for p in top["by_cpu"]],
+            "top_memory": [[p["name"], p["pid"], p["memory_percent"]] for p in top["by_memory"]]
+        }
+    if snap:
+        summary.update({
+            "cpu": {"percent": round(snap["cpu_percent"], 1), "cores": len(snap["cpu_per_core"]),
+                    "load_avg": [round(l, 2) for l in snap["load_avg"]]},
+            "memory": {"total_gb": round(snap["mem_total"] / gb, 2), "available_gb": round(snap["mem_available"] / gb, 2),
+                       "percent": snap["mem_percent"], "swap_percent": snap["swap_percent"]},
+            "disk_root": {"total_gb": round(snap["disk_total"] / gb, 2), "free_gb": round(snap["disk_free"] / gb, 2),
+                          "percent": snap["disk_percent"]},
+            "network_kbps": {"sent": round(snap["net_sent_bps"] / 1024, 1), "recv": round(snap["net_recv_bps"] / 1024, 1)}
+        })
+    return json.dumps(summary, separators=(",", ":"))
+
+# --- Fast-Path Intent Router ---
+# Common questions are answered straight from psutil; everything else reaches the LLM agent.
+# Only whole questions in the usual "what is the <metric> usage" shapes are matched, so a
+# question naming anything else (a process, a service, a package) or adding qualifiers
+# ("is chrome using", "do I need more") is never mistaken for a plain metric lookup.
+INTENT_TERMS = {
+    "cpu": (["cpu", "processor", "load average"], get_cpu_info),
+    "memory": (["memory", "ram", "mem", "swap"], get_memory_info),
+    "disk": (["disk", "disk space", "storage", "free space"], get_disk_info),
+    "network": (["network", "network traffic", "bandwidth"], get_network_info),
+    "processes": (["processes", "top processes", "running processes"], get_process_info),
+    "system": (["os", "os version", "operating system", "system info", "system information", "hostname", "kernel", "kernel version"], get_system_info),
+}
+TERM_TOOLS = {term: func for terms, func in INTENT_TERMS.values() for term in terms}
+_TERM = "|".join(sorted(map(re.escape, TERM_TOOLS), key=len, reverse=True))
+_TERMS = rf"(?P<terms>(?:{_TERM})(?:\s*(?:,|and|&)\s*(?:{_TERM}))*)"
+_QUALIFIER = r"(?:usage|use|utili[sz]ation|load|percent(?:age)?|stats|statistics|info|information|details|status)"
+QUESTION_FORMS = [
+    # "cpu usage", "what's the current memory usage", "show me disk and network stats"
+    re.compile(rf"(?:(?:what is|what's|whats|show me|show|check|get|tell me|give me) )?(?:the |my )?(?:current )?{_TERMS}"
+               rf"(?: {_QUALIFIER})?(?: (?:right )?now)?"),
+    # "how much memory is free", "how much disk space is left", "how much ram do i have"
+    re.compile(rf"how much {_TERMS}(?: is| do i have| is there)?(?: (?:used|free|available|left|in use|remaining))?"),
+    re.compile(rf"how much free {_TERMS}(?: is there| do i have| is left)?"),
+]
+# "which processes are using the most cpu"
+PROCESS_FORM = re.compile(r"(?:what|which) (?:process|processes|apps|programs) (?:is|are) (?:using|consuming|hogging) the most (?:cpu|memory|ram|resources)")
+SUMMARY_FORM = re.compile(r"(?:(?:show me|show|give me) )?(?:an? |the )?(?:system )?(?:summary|overview|health|health check|status)")
+
+def route_question(question):
+    """
+    Returns the list of tool functions that answer `question` directly,
+    or None if it should go to the LLM agent.
+    """
+    text = re.sub(r"\s+", " ", question.lower()).strip(" ?.!")
+    text = re.sub(r"^(?:please |hey,? )|,? please$", "", text)
+
+    if PROCESS_FORM.fullmatch(text):
+        return [get_process_info]
+    if SUMMARY_FORM.fullmatch(text):
+        return [func for _, func in INTENT_TERMS.values()]
+    for form in QUESTION_FORMS:
+        match = form.fullmatch(text)
+        if match:
+            terms = re.split(r"\s*(?:,|\band\b|&)\s*", match.group("terms"))
+            return list(dict.fromkeys(TERM_TOOLS[term] for term in terms if term))
+    return None
+
+def answer_locally(tools):
+    """Runs the routed tools and formats their results as a chat answer."""
+    return "\n".join(f"- {tool('')}" for tool in tools)
+
+# --- Agent Tracing ---
+AGENT_TRACE_LOG = st.secrets.get("agent_trace_log", "logs/agent_traces.jsonl")
+
+class AgentTracer(BaseCallbackHandler):
+    """
+    Records per-question timings: each LLM call (latency, tokens), each tool call
+    (latency, errors) and parsing retries. Events are grouped by the `trace_id` passed
+    in the run metadata, so one tracer can be shared by every session. Finished
+    traces are appended as JSON lines to `sink_path`.
+    """
+
+    def __init__(self, sink_path=None):
+        self.sink_path = sink_path
+        self._runs = {}      # run_id -> (trace_id, step)
+        self._traces = {}    # trace_id -> trace dict
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, metadata, step):
+        trace_id = (metadata or {}).get("trace_id")
+        if trace_id is None:
+            return
+        step["started"] = time.perf_counter()
+        with self._lock:
+            trace = self._traces.setdefault(trace_id, {
+                "trace_id": trace_id, "question": metadata.get("question", ""),
+                "timestamp": time.time(), "started": step["started"], "steps": [], "retries": 0
+            })
+            if step["type"] != "chain":
+                trace["steps"].append(step)
+            self._runs[run_id] = (trace_id, step)
+
+    def _end(self, run_id, **fields):
+        with self._lock:
+            trace_id, step = self._runs.pop(run_id, (None, None))
+        if step is not None:
+            step["latency_s"] = round(time.perf_counter() - step.pop("started"), 3)
+            step.update(fields)
+        return trace_id
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, metadata, {"type": "llm", "name": (serialized or {}).get("name", "LLM")})
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, metadata, {"type": "llm", "name": (serialized or {}).get("name", "LLM")})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens = output_tokens = 0
+        for generation in (response.generations[0] if response.generations else []):
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            input_tokens += usage.get("input_tokens", 0)
+            output_tokens += usage.get("output_tokens", 0)
+        self._end(run_id, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, metadata, {"type": "tool", "name": (serialized or {}).get("name", "tool")})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error))
+
+    def on_agent_action(self, action, *, run_id, **kwargs):
+        # handle_parsing_errors turns unparsable LLM output into an `_Exception` action
+        if action.tool == "_Exception":
+            with self._lock:
+                trace_id, _ = self._runs.get(run_id, (None, None))
+                if trace_id in self._traces:
+                    self._traces[trace_id]["retries"] += 1
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        if parent_run_id is None:
+            self._start(run_id, metadata, {"type": "chain"})
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._finish(self._end(run_id))
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._finish(self._end(run_id), error=str(error))
+
+    def _finish(self, trace_id, error=None):
+        with self._lock:
+            trace = self._traces.get(trace_id)
+        if trace is None:
+            return
+        llm_steps = [step for step in trace["steps"] if step["type"] == "llm"]
+        tool_steps = [step for step in trace["steps"] if step["type"] == "tool"]
+        trace.update({
+            "total_s": round(time.perf_counter() - trace.pop("started"), 3),
+            "llm_s": round(sum(step.get("latency_s", 0) for step in llm_steps), 3),
+            "tool_s": round(sum(step.get("latency_s", 0) for step in tool_steps), 3),
+            "llm_calls": len(llm_steps),
+            "tool_calls": len(tool_steps),
+            "input_tokens": sum(step.get("input_tokens", 0) for step in llm_steps),
+            "output_tokens": sum(step.get("output_tokens", 0) for step in llm_steps),
+            "error": error
+        })
+        self._write(trace)
+
+    def _write(self, trace):
+        if not self.sink_path:
+            return
+        try:
+            path = Path(self.sink_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock, path.open("a", encoding="utf-8") as sink:
+                sink.write(json.dumps(trace) + "\n")
+        except OSError:
+            pass  # Tracing must never break the chat
+
+    def pop(self, trace_id):
+        """Returns and forgets a finished trace."""
+        with self._lock:
+            return self._traces.pop(trace_id, None)
+
+@st.cache_resource
+def get_agent_tracer():
+    """Process-wide tracer shared by the cached agent."""
+    return AgentTracer(sink_path=AGENT_TRACE_LOG)
+
+def render_trace(trace):
+    """Shows a trace's latency breakdown in an expandable panel."""
+    title = (f"⏱️ {trace['total_s']:.2f}s total · LLM {trace['llm_s']:.2f}s ({trace['llm_calls']} calls) · "
+             f"tools {trace['tool_s']:.2f}s · {trace['retries']} retries")
+    with st.expander(title):
+        st.caption(f"Tokens — input: {trace['input_tokens']}, output: {trace['output_tokens']}")
+        steps = [
+            {"Step": i + 1, "Type": step["type"], "Name": step["name"], "Latency (s)": step.get("latency_s"),
+             "Input Tokens": step.get("input_tokens"), "Output Tokens": step.get("output_tokens"), "Error": step.get("error")}
+            for i, step in enumerate(trace["steps"])
+        ]
+        st.dataframe(steps, hide_index=True, use_container_width=True)
 
 # Use st.cache_resource to initialize the agent only once
 @st.cache_resource
 def get_langchain_agent():
     """Initializes and returns the LangChain agent."""
     st.write("Initializing AI Agent... (This happens only once)")
+    # The tracer is attached to the LLM, every tool and the executor itself
+    tracer = get_agent_tracer()
     
     # Load Gemini LLM
     llm = ChatGoogleGenerativeAI(
         model="gemini-1.5-flash",
         temperature=0.2,
-        google_api_key=st.secrets["GOOGLE_API_KEY"]
+        google_api_key=st.secrets["GOOGLE_API_KEY"],
+        streaming=True, # Emit tokens through callbacks as they are generated
+        callbacks=[tracer]
     )
 
     # Wrap functions into LangChain Tools
     tools = [
-        Tool(name="CPU Info", func=get_cpu_info, description="Useful for getting the current CPU utilization percentage."),
-        Tool(name="Memory Info", func=get_memory_info, description="Useful for getting system RAM and memory statistics."),
-        Tool(name="System Info", func=get_system_info, description="Useful for getting operating system (OS) and hardware info."),
-        Tool(name="Disk Info", func=get_disk_info, description="Useful for getting root disk space and usage statistics.")
+        Tool(name="System Snapshot", func=get_system_snapshot, description="Use this first for broad questions such as a summary, overview or health of the system. Returns CPU, memory, disk, network, OS and the top processes by CPU and memory in a single call.", callbacks=[tracer]),
+        Tool(name="CPU Info", func=get_cpu_info, description="Useful for getting the current CPU utilization percentage.", callbacks=[tracer]),
+        Tool(name="Memory Info", func=get_memory_info, description="Useful for getting system RAM and memory statistics.", callbacks=[tracer]),
+        Tool(name="System Info", func=get_system_info, description="Useful for getting operating system (OS) and hardware info.", callbacks=[tracer]),
+        Tool(name="Disk Info", func=get_disk_info, description="Useful for getting root disk space and usage statistics.", callbacks=[tracer]),
+        Tool(name="Network Info", func=get_network_info, description="Useful for getting current network upload and download throughput.", callbacks=[tracer]),
+        Tool(name="Process Info", func=get_process_info, description="Useful for finding which processes use the most CPU and memory.", callbacks=[tracer])
     ]
 
     # Create the LangChain Agent
@@ -65,10 +342,107 @@ def get_langchain_agent():
         llm=llm,
         agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
         verbose=True, # Set to True to see the agent's thought process in the terminal
-        handle_parsing_errors=True # Handles cases where the LLM output is not perfect
+        handle_parsing_errors=True, # Handles cases where the LLM output is not perfect
+        callbacks=[tracer]
     )
     return agent
 
+# --- Streaming Agent Output ---
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """
+    Forwards the tokens that follow 'Final Answer:' in the ReAct output to a queue. If the
+    model is called again after streaming (the output failed to parse and is retried),
+    RESET is queued so the rejected draft can be discarded.
+    """
+
+    MARKER = "Final Answer:"
+    RESET = object()
+
+    def __init__(self, token_queue):
+        self.token_queue = token_queue
+        self._buffer = ""
+        self._streaming = False
+        self._answer_started = False
+
+    def _new_call(self):
+        if self._answer_started:
+            self.token_queue.put(self.RESET)
+        self._buffer = ""
+        self._streaming = False
+        self._answer_started = False
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._new_call()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._new_call()
+
+    # Having these pass-through hooks marks the handler as a streaming handler,
+    # which makes LangChain call the model's streaming API and emit on_llm_new_token.
+    def tap_output_iter(self, run_id, output):
+        return output
+
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not self._streaming:
+            self._buffer += token
+            if self.MARKER not in self._buffer:
+                return
+            self._streaming = True
+            token = self._buffer.split(self.MARKER, 1)[1]
+        if not self._answer_started:
+            # Skip the whitespace between the marker and the answer
+            token = token.lstrip()
+            if not token:
+                return
+            self._answer_started = True
+        self.token_queue.put(token)
+
+def stream_agent_answer(agent, prompt, steps_container, answer_box, trace_id):
+    """
+    Runs the agent in a worker thread, drawing the final answer into `answer_box` token
+    by token as a draft, and returns the agent's parsed output, which replaces the draft.
+    Intermediate thoughts and tool calls are rendered live into `steps_container`;
+    `trace_id` tags the run so the tracer can group its timings.
+    """
+    token_queue = queue.Queue()
+    result = {}
+
+    def run_agent():
+        try:
+            result["output"] = agent.invoke({"input": prompt}, config={
+                "callbacks": [
+                    StreamlitCallbackHandler(steps_container, expand_new_thoughts=False),
+                    FinalAnswerStreamHandler(token_queue)
+                ],
+                "metadata": {"trace_id": trace_id, "question": prompt}
+            })["output"]
+        except Exception as e:
+            result["error"] = e
+        finally:
+            token_queue.put(None)
+
+    worker = threading.Thread(target=run_agent, daemon=True)
+    # Let the worker draw the intermediate steps into this session's page
+    add_script_run_ctx(worker, get_script_run_ctx())
+    worker.start()
+
+    draft = ""
+    while (token := token_queue.get()) is not None:
+        # A retried model call starts a new answer; the rejected draft is dropped
+        draft = "" if token is FinalAnswerStreamHandler.RESET else draft + token
+        answer_box.markdown(draft + "▌" if draft else "")
+    worker.join()
+
+    if "error" in result:
+        answer_box.empty()
+        raise result["error"]
+    # What the agent actually accepted is what is shown and kept in the history
+    answer_box.markdown(result["output"])
+    return result["output"]
+
 # --- STREAMLIT UI ---
 
 # First, check for the API key
@@ -99,6 +473,8 @@ if "sys_agent_messages" not in st.session_state:
 for message in st.session_state.sys_agent_messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("trace"):
+            render_trace(message["trace"])
 
 # Accept user input
 if prompt := st.chat_input("Ask about your system..."):
@@ -110,13 +486,25 @@ if prompt := st.chat_input("Ask about your system..."):
 
     # Display assistant response in chat message container
     with st.chat_message("assistant"):
-        with st.spinner("🤖 The agent is thinking..."):
+        routed_tools = route_question(prompt)
+        if routed_tools:
+            # Fast path: no LLM round trips needed
+            response = answer_locally(routed_tools)
+            st.markdown(response)
+            st.caption("⚡ Answered locally without calling the AI agent.")
+            st.session_state.sys_agent_messages.append({"role": "assistant", "content": response})
+        else:
+            trace_id = uuid.uuid4().hex
             try:
-                response = agent.run(prompt)
-                st.markdown(response)
+                steps_container = st.container()
+                response = stream_agent_answer(agent, prompt, steps_container, st.empty(), trace_id)
+                trace = get_agent_tracer().pop(trace_id)
+                if trace:
+                    render_trace(trace)
                 # Add assistant response to chat history
-                st.session_state.sys_agent_messages.append({"role": "assistant", "content": response})
+                st.session_state.sys_agent_messages.append({"role": "assistant", "content": response, "trace": trace})
             except Exception as e:
+                get_agent_tracer().pop(trace_id)
                 error_message = f"❌ An error occurred: {str(e)}"
                 st.error(error_message)
                 st.session_state.sys_agent_messages.append({"role": "assistant", "content": error_message})
\ No newline at end of file
@@ -1,72 +1,415 @@
 # pages/11_SSH_Remote_Execution.py
 
 import streamlit as st
+import pandas as pd
 import paramiko
+import difflib
+import hashlib
+import os
+import posixpath
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from ssh_pool import OutputBuffer, get_ssh_pool
+from sftp_transfer import TransferProgress, upload_file, download_file
+from sftp_browser import RemoteBrowser
 
 # --- Page Configuration ---
 st.set_page_config(page_title="SSH Command Execution", page_icon="📡")
 st.title("📡 Remote SSH Command Execution")
 st.markdown("Execute commands on a remote Linux server securely from your dashboard.")
 
+# --- Shared SSH Connection Pool ---
+# get_ssh_pool() returns the one pool per server process (shared with the monitoring page):
+# repeat commands reuse the same authenticated transport.
+@st.cache_resource
+def get_remote_browser():
+    """Directory listings and SFTP sessions for the file browser, shared across sessions."""
+    return RemoteBrowser(get_ssh_pool(), ttl=LISTING_TTL)
+
+# --- Output Limits ---
+OUTPUT_MAX_LINES = 5000   # older lines are dropped once a command prints more than this
+REFRESH_INTERVAL = 0.25   # seconds between live output redraws
+FANOUT_MAX_LINES = 1000   # per-host output kept in multi-host mode
+MAX_PARALLEL_HOSTS = 16   # concurrent SSH sessions in multi-host mode
+MAX_PARALLEL_TRANSFERS = 8  # concurrent SFTP file transfers across all hosts
+DOWNLOAD_DIR = st.secrets.get("sftp_download_dir", "downloads")
+LISTING_TTL = 30          # seconds a remote directory listing is reused
+
 # --- Helper Function for SSH Execution ---
-def execute_ssh_command(host, port, username, password, command):
+def stream_ssh_command(host, port, username, password, command, output_box):
     """
-    Connects to a remote server via SSH and executes a given command.
-    Returns the command's output and any errors.
+    Executes a command on a remote server over a pooled SSH connection, redrawing
+    `output_box` with interleaved stdout/stderr as it arrives.
+    Returns (buffer, exit_status, error_message).
     """
+    buffer = OutputBuffer(max_lines=OUTPUT_MAX_LINES)
+
     # Defensive check for empty command
     if not command.strip():
-        return "", "Command cannot be empty."
+        return buffer, None, "Command cannot be empty."
+
+    exit_status = None
+    last_draw = 0.0
+    try:
+        for stream, chunk in get_ssh_pool().stream_command(host, port, username, password, command):
+            if stream == "exit":
+                exit_status = chunk
+                continue
+            buffer.write(stream, chunk)
+            if time.time() - last_draw >= REFRESH_INTERVAL:
+                output_box.code(buffer.text(), language="bash")
+                last_draw = time.time()
+        buffer.flush()
+        if buffer.total_lines:
+            output_box.code(buffer.text(), language="bash")
+        return buffer, exit_status, None
+    except Exception as e:
+        return buffer, None, describe_ssh_error(e)
+
+def describe_ssh_error(error):
+    """Turns a connection/execution exception into a user-facing message."""
+    if isinstance(error, paramiko.AuthenticationException):
+        return "Authentication failed. Please check your username and password."
+    if isinstance(error, TimeoutError):
+        return f"Timed out: {error}"
+    if isinstance(error, paramiko.SSHException):
+        return f"SSH connection error: {error}"
+    return f"An unexpected error occurred: {error}"
+
+# --- Multi-Host Fan-Out ---
+def load_host_list():
+    """Returns the default multi-host list from secrets (`ssh_hosts`), one host per line."""
+    return "\n".join(st.secrets.get("ssh_hosts", []))
+
+def parse_host_list(text, default_user, default_port):
+    """
+    Parses `[user@]host[:port]` lines (blank lines and `#` comments are skipped) into (host, port, user).
+    IPv6 addresses are written bare or as `[addr]:port`. Lines that don't parse are skipped with a warning.
+    """
+    targets, invalid = [], []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        user, _, address = line.rpartition("@")
+        if address.startswith("["):
+            host, _, port = address[1:].partition("]")
+            # Anything after the bracket other than `:port` is malformed
+            port = port[1:] if port.startswith(":") else (None if port else "")
+        elif address.count(":") > 1:
+            host, port = address, ""  # Bare IPv6 literal
+        else:
+            host, _, port = address.partition(":")
+        if not host or port is None or (port and not (port.isdigit() and 0 < int(port) < 65536)):
+            invalid.append(line)
+            continue
+        targets.append((host, int(port) if port else int(default_port), user or default_user))
+    if invalid:
+        st.warning("Skipped lines that aren't `[user@]host[:port]`: " + ", ".join(f"`{line}`" for line in invalid))
+    return tuple(dict.fromkeys(targets))
+
+def run_on_host(pool, target, password, command, timeout):
+    """Runs `command` on one host and returns its result row plus the bounded output."""
+    host, port, user = target
+    buffer = OutputBuffer(max_lines=FANOUT_MAX_LINES)
+    exit_status, error, status = None, None, None
+    start = time.monotonic()
+    try:
+        for stream, chunk in pool.stream_command(host, port, user, password, command, timeout=timeout):
+            if stream == "exit":
+                exit_status = chunk
+            else:
+                buffer.write(stream, chunk)
+        buffer.flush()
+        status = "ok" if exit_status == 0 else "failed"
+    except Exception as e:
+        error = describe_ssh_error(e)
+        status = "timeout" if isinstance(e, TimeoutError) else "error"
+
+    return {
+        "Host": f"{user}@{host}:{port}", "Status": status, "Exit Code": exit_status,
+        "Duration (s)": round(time.monotonic() - start, 2), "Lines": buffer.total_lines,
+        "Output": error or buffer.text(),
+    }
+
+def run_fanout(targets, password, command, timeout, progress):
+    """Runs `command` on every target with a bounded worker pool; rows arrive as hosts finish."""
+    pool = get_ssh_pool()
+    results = []
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_HOSTS, len(targets))) as executor:
+        futures = [executor.submit(run_on_host, pool, target, password, command, timeout) for target in targets]
+        for done, future in enumerate(as_completed(futures), start=1):
+            results.append(future.result())
+            progress.progress(done / len(targets), text=f"{done}/{len(targets)} hosts finished")
+    return results
+
+def group_identical_output(results):
+    """Groups hosts whose exit code and output match exactly; largest group first."""
+    groups = {}
+    for row in results:
+        digest = hashlib.sha1(f"{row['Exit Code']}\0{row['Output']}".encode("utf-8")).hexdigest()
+        groups.setdefault(digest, []).append(row)
+    return sorted(groups.values(), key=len, reverse=True)
+
+def render_output_groups(groups):
+    """Shows each group of identical output once, diffed against the most common output."""
+    baseline = groups[0][0]["Output"].splitlines()
+    for index, rows in enumerate(groups):
+        hosts = ", ".join(sorted(row["Host"] for row in rows))
+        label = f"{len(rows)} host(s) · {rows[0]['Status']} · exit {rows[0]['Exit Code']}: {hosts}"
+        with st.expander(label, expanded=index == 0):
+            st.code(rows[0]["Output"] or "(no output)", language="bash")
+            if index:
+                diff = difflib.unified_diff(
+                    baseline, rows[0]["Output"].splitlines(),
+                    fromfile="most common output", tofile="this group", lineterm=""
+                )
+                st.code("\n".join(diff) or "(identical text, different exit code)", language="diff")
+
+
+# --- SFTP File Transfer ---
+def transfer_one(pool, target, password, direction, source, destination, progress, task):
+    """Runs one upload or download on its own SFTP channel of the pooled connection."""
+    host, port, user = target
+    try:
+        sftp = pool.open_sftp(host, port, user, password)
+        try:
+            if direction == "Upload":
+                upload_file(sftp, source, destination, progress, task)
+            else:
+                download_file(sftp, source, destination, progress, task)
+        finally:
+            sftp.close()
+        progress.finish(task, "done")
+    except Exception as e:
+        progress.finish(task, "error", describe_ssh_error(e))
+
+def plan_transfers(targets, direction, paths, destination):
+    """Expands hosts x files into (target, source, destination) jobs."""
+    jobs = []
+    for target in targets:
+        for path in paths:
+            if direction == "Upload":
+                jobs.append((target, path, posixpath.join(destination, os.path.basename(path))))
+            else:
+                # One local folder per host so the same log from many servers doesn't collide, and the
+                # remote directories are kept under it so same-named files from one host don't either
+                host, port, _ = target
+                folder = host if port == 22 else f"{host}_{port}"
+                parts = [part for part in posixpath.normpath(path).split("/") if part not in ("", ".", "..")]
+                jobs.append((target, path, os.path.join(destination, folder, *parts)))
+    return jobs
+
+def duplicate_destinations(jobs):
+    """Destinations that more than one job would write (and so share a `.part` file)."""
+    seen, duplicates = set(), []
+    for target, _, destination in jobs:
+        key = (target[:2], os.path.normpath(destination))
+        if key in seen:
+            duplicates.append(destination)
+        seen.add(key)
+    return duplicates
+
+def run_transfers(jobs, password, direction, progress_bar, status_box, table_box):
+    """Runs transfers in parallel across files and hosts, redrawing progress until all finish."""
+    pool = get_ssh_pool()
+    progress = TransferProgress()
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_TRANSFERS, len(jobs))) as executor:
+        futures = []
+        for task, (target, source, destination) in enumerate(jobs):
+            host, port, user = target
+            progress.add(task, f"{user}@{host}:{port}:{source if direction == 'Download' else destination}")
+            futures.append(executor.submit(transfer_one, pool, target, password, direction, source, destination, progress, task))
+
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=REFRESH_INTERVAL * 2)
+            rows, moved, total = progress.snapshot()
+            done = sum(row["Done"] for row in rows)
+            elapsed = max(time.time() - progress.started, 1e-6)
+            progress_bar.progress(min(done / total, 1.0) if total else 0.0,
+                                  text=f"{done / 1048576:.1f} / {total / 1048576:.1f} MiB")
+            status_box.caption(f"Throughput: {moved / 1048576 / elapsed:.2f} MiB/s · "
+                               f"{sum(row['Status'] in ('done', 'error') for row in rows)}/{len(rows)} files finished")
+            table_box.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    rows = progress.snapshot()[0]
+    if direction == "Upload":
+        # The browser would otherwise show the old listing until its TTL runs out
+        browser = get_remote_browser()
+        for (target, _, destination), row in zip(jobs, rows):
+            if row["Status"] == "done":
+                host, port, user = target
+                browser.invalidate(host, port, user, password, posixpath.dirname(destination))
+    return rows
+
+def render_file_transfer(targets, password):
+    """Upload/download form for the hosts in the host list."""
+    st.subheader("File Transfer (SFTP)")
+    direction = st.radio("Direction", ["Upload", "Download"], horizontal=True)
+    if direction == "Upload":
+        paths_text = st.text_area("Local files on the dashboard server (one per line)", placeholder="/srv/bundles/app-config.tar.gz")
+        destination = st.text_input("Remote directory", value="/tmp")
+    else:
+        paths_text = st.text_area("Remote files (one per line)", placeholder="/var/log/messages")
+        destination = st.text_input("Local download directory", value=DOWNLOAD_DIR)
+        st.caption("Files are saved as `<directory>/<host>/<remote path>`.")
+    paths = [line.strip() for line in paths_text.splitlines() if line.strip()]
+    st.caption("Interrupted transfers resume from their `.part` file when started again.")
+
+    if st.button(f"📦 {direction} {len(paths)} file(s) to/from {len(targets)} host(s)", use_container_width=True):
+        if not targets or not password:
+            st.warning("Please enter at least one host and the password.")
+            return
+        if not paths or not destination:
+            st.warning("Please enter the files and the destination.")
+            return
+        missing = [path for path in paths if direction == "Upload" and not os.path.isfile(path)]
+        if missing:
+            st.warning(f"Local file(s) not found: {', '.join(missing)}")
+            return
+
+        jobs = plan_transfers(targets, direction, paths, destination)
+        duplicates = duplicate_destinations(jobs)
+        if duplicates:
+            st.error(f"Several files would be written to the same place: {', '.join(sorted(set(duplicates)))}")
+            return
+        rows = run_transfers(jobs, password, direction, st.progress(0.0), st.empty(), st.empty())
+        failed = [row for row in rows if row["Status"] == "error"]
+        if failed:
+            st.error(f"{len(failed)} of {len(rows)} transfers failed.")
+        else:
+            st.success(f"All {len(rows)} transfers completed.")
+
+
+# --- Remote File Browser ---
+def open_browser_entry(table_key, entries, connection):
+    """Dataframe selection callback: enters a directory or selects a file for preview."""
+    rows = st.session_state[table_key].selection.rows
+    if not rows:
+        return
+    entry = entries[rows[0]]
+    is_dir = entry["kind"] == "dir"
+    if entry["kind"] == "link":
+        # Links are only resolved when opened, keeping a listing to one round-trip
+        try:
+            is_dir = get_remote_browser().is_dir(*connection, entry["path"])
+        except IOError:
+            is_dir = False  # Dangling link
+    if is_dir:
+        st.session_state["browse_path"] = entry["path"]
+        st.session_state.pop("browse_file", None)
+    else:
+        st.session_state["browse_file"] = entry["path"]
+
+def go_up():
+    st.session_state["browse_path"] = posixpath.dirname(st.session_state["browse_path"].rstrip("/")) or "/"
+    st.session_state.pop("browse_file", None)
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def render_file_browser(host, port, username, password):
+    """Browses one directory at a time; only the opened directory is listed."""
+    st.subheader("Remote File Browser")
+    browser = get_remote_browser()
+    st.session_state.setdefault("browse_path", "/var/log")
+
+    nav1, nav2, nav3 = st.columns([6, 1, 1])
+    nav1.text_input("Path", key="browse_path", label_visibility="collapsed")
+    nav2.button("⬆️ Up", on_click=go_up, use_container_width=True)
+    if nav3.button("🔄", help="Reload this directory", use_container_width=True):
+        browser.invalidate(host, port, username, password, st.session_state["browse_path"])
+
+    path = st.session_state["browse_path"]
+    try:
+        entries = browser.listdir(host, port, username, password, path)
+    except (FileNotFoundError, PermissionError) as e:
+        st.error(f"Cannot list {path}: {e}")
+        return
+    except Exception as e:
+        st.error(describe_ssh_error(e))
+        return
+
+    icons = {"dir": "📁", "file": "📄", "link": "🔗"}
+    listing = pd.DataFrame({
+        "": [icons[e["kind"]] for e in entries],
+        "Name": [e["name"] for e in entries],
+        "Size": [format_size(e["size"]) if e["kind"] == "file" else "" for e in entries],
+        "Modified": pd.to_datetime([e["mtime"] for e in entries], unit="s"),
+    })
+    # Keyed per directory, so a row selected here doesn't carry over into the next listing
+    table_key = f"browser_table:{host}:{port}:{posixpath.normpath(path)}"
+    st.dataframe(
+        listing, key=table_key, hide_index=True, use_container_width=True,
+        on_select=lambda: open_browser_entry(table_key, entries, (host, port, username, password)),
+        selection_mode="single-row"
+    )
+    st.caption(f"{len(entries)} entries · listings are cached for {LISTING_TTL}s")
 
-    client = paramiko.SSHClient()
-    # This policy allows connecting to servers without having their key in the known_hosts file.
-    # SECURITY NOTE: In a production environment, it's more secure to manage known_hosts properly.
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    selected = st.session_state.get("browse_file")
+    if not selected or posixpath.dirname(selected) != posixpath.normpath(path):
+        return
 
+    st.markdown(f"**Preview:** `{selected}`")
+    p1, p2 = st.columns(2)
+    preview_kb = p1.number_input("Preview size (KB)", min_value=4, max_value=1024, value=64, step=4)
+    from_end = p2.radio("Read from", ["Start", "End"], horizontal=True) == "End"
     try:
-        # Connect to the server
-        client.connect(hostname=host, port=port, username=username, password=password, timeout=10)
-        
-        # Execute the command
-        stdin, stdout, stderr = client.exec_command(command)
-
-        # Read the output and errors
-        # A small sleep can sometimes help ensure all output is captured for long-running commands
-        time.sleep(1) 
-        output = stdout.read().decode('utf-8')
-        errors = stderr.read().decode('utf-8')
-
-        return output, errors
-
-    except paramiko.AuthenticationException:
-        return "", "Authentication failed. Please check your username and password."
-    except paramiko.SSHException as ssh_err:
-        return "", f"SSH connection error: {ssh_err}"
+        data, size = browser.preview(host, port, username, password, selected, preview_kb * 1024, from_end)
     except Exception as e:
-        return "", f"An unexpected error occurred: {e}"
-    finally:
-        # Always ensure the connection is closed
-        if client:
-            client.close()
+        st.error(f"Cannot read {selected}: {e}")
+        return
+
+    if b"\0" in data[:8192]:
+        st.info(f"Binary file ({format_size(size)}); no preview.")
+        return
+    if size > len(data):
+        st.caption(f"Showing the {'last' if from_end else 'first'} {format_size(len(data))} of {format_size(size)}.")
+    st.code(data.decode("utf-8", "replace"), language=None)
 
 
 # --- Streamlit UI ---
 
+mode = st.radio("Mode", ["Single host", "Multiple hosts", "File transfer", "File browser"], horizontal=True)
+
 # Use columns for a cleaner layout
 col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Connection Details")
     # Load credentials from st.secrets if they exist, otherwise use empty strings
-    host = st.text_input("Host IP / Hostname", value=st.secrets.get("ssh_credentials", {}).get("host", ""))
+    if mode in ("Single host", "File browser"):
+        host = st.text_input("Host IP / Hostname", value=st.secrets.get("ssh_credentials", {}).get("host", ""))
+    else:
+        host_list = st.text_area(
+            "Hosts (one per line, `[user@]host[:port]`)", value=load_host_list(),
+            placeholder="web-01\nadmin@db-01:2222"
+        )
     port = st.number_input("Port", value=st.secrets.get("ssh_credentials", {}).get("port", 22))
+    if mode == "Multiple hosts":
+        host_timeout = st.number_input("Per-host timeout (s)", min_value=1, value=30)
 
 with col2:
     st.subheader("Authentication")
     username = st.text_input("Username", value=st.secrets.get("ssh_credentials", {}).get("username", ""))
     password = st.text_input("Password", type="password", value=st.secrets.get("ssh_credentials", {}).get("password", ""))
 
+if mode == "File transfer":
+    render_file_transfer(parse_host_list(host_list, username, port), password)
+    st.stop()
+
+if mode == "File browser":
+    if host and username and password:
+        render_file_browser(host, int(port), username, password)
+    else:
+        st.info("Fill in the connection and authentication details to browse the remote filesystem.")
+    st.stop()
+
 st.subheader("Command to Execute")
 # Provide some example commands
 command_examples = ["ls -la", "df -h", "uname -a", "whoami"]
@@ -74,22 +417,52 @@ command = st.text_area("Enter your Linux command here:", placeholder=f"e.g., {co
 
 # Execute button
 if st.button("🚀 Execute Command", use_container_width=True):
-    if not host or not username or not password:
+    if mode == "Multiple hosts":
+        targets = parse_host_list(host_list, username, port)
+        if not targets or not password:
+            st.warning("Please enter at least one host and the password.")
+        elif not command.strip():
+            st.warning("Command cannot be empty.")
+        else:
+            st.markdown("---")
+            st.subheader("Execution Results")
+            progress = st.progress(0.0, text=f"0/{len(targets)} hosts finished")
+            results = run_fanout(targets, password, command, host_timeout, progress)
+
+            ok = sum(row["Status"] == "ok" for row in results)
+            st.markdown(f"**{ok}/{len(results)}** hosts succeeded.")
+            st.dataframe(
+                pd.DataFrame(results).drop(columns="Output").astype({"Exit Code": "Int64"}).sort_values(["Status", "Host"]),
+                use_container_width=True, hide_index=True
+            )
+
+            st.subheader("Output by Group")
+            render_output_groups(group_identical_output(results))
+
+    elif not host or not username or not password:
         st.warning("Please fill in all connection and authentication details.")
     else:
-        with st.spinner("Connecting and executing... Please wait."):
-            output, errors = execute_ssh_command(host, port, username, password, command)
-
         st.markdown("---")
         st.subheader("Execution Results")
+        status_box = st.empty()
+        status_box.info("Running... output appears below as it arrives.")
+        output_box = st.empty()
+
+        buffer, exit_status, error = stream_ssh_command(host, port, username, password, command, output_box)
+
+        if error:
+            status_box.error(error)
+        elif exit_status:
+            status_box.error(f"Command exited with status {exit_status}.")
+        else:
+            status_box.success("Command completed successfully.")
+
+        if buffer.dropped:
+            st.caption(f"Showing the last {OUTPUT_MAX_LINES} of {buffer.total_lines} lines.")
+
+        if buffer.has_stream("stderr"):
+            with st.expander("Errors (stderr only)"):
+                st.code(buffer.text("stderr"), language="bash")
 
-        if errors:
-            st.error("Errors occurred:")
-            st.code(errors, language="bash")
-        
-        if output:
-            st.success("Output:")
-            st.code(output, language="bash")
-            
-        if not output and not errors:
-            st.info("Command executed successfully with no output.")
\ No newline at end of file
+        if not error and not buffer.total_lines:
+            st.info("Command executed successfully with no output.")
@@ -1,12 +1,31 @@
 # pages/15_windows_kubernetes_manager.py
 
 import streamlit as st
+import pandas as pd
+import altair as alt
+import re
 import subprocess
+import time
+from k8s_watch import KubeWatchCache
+from k8s_logs import PodLogStream, filter_lines
+from k8s_metrics import KubeMetricsSampler
+from metric_store import MetricStore, downsample_lttb
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Local Kubernetes Manager", page_icon="☸️")
 st.title("☸️ Local Kubernetes Manager (Windows)")
-st.markdown("Interact with your local Minikube cluster by running `kubectl` commands.")
+st.markdown("Interact with your local Minikube cluster, or several kubectl contexts at once, by running `kubectl` commands.")
+
+CONTEXT_TIMEOUT = 10  # Seconds to wait for each cluster's first list before showing it as timed out
+LOG_TAIL_LINES = 200  # History fetched when a log stream starts
+LOG_BUFFER_LINES = 2000  # Ring buffer size per log stream
+LOG_DISPLAY_LINES = 500  # Most matching lines sent to the browser
+MAX_LOG_STREAMS = 8
+LOG_STREAM_CACHE = 4 * MAX_LOG_STREAMS  # Streams kept across sessions before the oldest is stopped
+METRICS_INTERVAL = 15  # Seconds between metrics-server samples
+METRICS_CAPACITY = 24 * 60 * 60 // METRICS_INTERVAL  # 24 hours of samples per series
+CHART_MAX_POINTS = 800  # Roughly one point per horizontal pixel of the chart
+TOP_SERIES = 10  # Busiest namespaces/nodes drawn per chart
 
 # --- Local Command Execution Function ---
 def execute_local_command(command):
@@ -30,21 +49,218 @@ def execute_local_command(command):
     except Exception as e:
         return "", f"An unexpected error occurred: {str(e)}"
 
+# --- Watch Caches ---
+@st.cache_resource
+def get_watch_cache(kind, context=None):
+    """One list+watch cache per (resource kind, kubectl context), shared by every session."""
+    return KubeWatchCache(kind, context=context).start()
+
+@st.cache_data(ttl=300)
+def get_contexts():
+    """Returns (all kubectl context names, current context); empty if kubectl isn't usable."""
+    try:
+        names = subprocess.run(["kubectl", "config", "get-contexts", "-o", "name"], capture_output=True, text=True, timeout=10)
+        current = subprocess.run(["kubectl", "config", "current-context"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return [], None
+    return names.stdout.split(), current.stdout.strip() or None
+
+def collect_rows(kind, contexts):
+    """
+    Merges rows from every selected context into one list with a Cluster column.
+    Each cluster syncs in its own watch thread, so they all load concurrently; each
+    gets CONTEXT_TIMEOUT from the same start, so the total wait is about the slowest
+    cluster's, and one failing cluster only affects its own status.
+    """
+    caches = {context: get_watch_cache(kind, context) for context in contexts}
+    deadline = time.time() + CONTEXT_TIMEOUT
+    rows, statuses = [], []
+    for context, cache in caches.items():
+        cluster = context or "current"
+        cluster_rows = cache.rows(timeout=max(deadline - time.time(), 0))
+        if cache.error:
+            status = f"Error: {cache.error}"
+        elif not cache.synced:
+            status = "Timed out"
+        else:
+            status = "OK"
+        rows.extend({"Cluster": cluster, **row} for row in cluster_rows)
+        statuses.append({"Cluster": cluster, "Status": status, "Objects": len(cluster_rows)})
+    return rows, statuses
+
+# --- Pod Log Streams ---
+@st.cache_resource(max_entries=LOG_STREAM_CACHE, on_release=lambda stream: stream.stop())
+def get_log_stream(context, namespace, pod, container):
+    """
+    One follow-mode stream per pod/container, shared by every session viewing it. Bounded,
+    so container names typed in by hand can't pile up streams; evicted ones are stopped.
+    """
+    return PodLogStream(namespace, pod, container, context, tail=LOG_TAIL_LINES, max_lines=LOG_BUFFER_LINES)
+
+def render_log_viewer(streams, pattern, min_level, follow):
+    """Filters the buffered lines on the server and shows only the newest matches."""
+    @st.fragment(run_every=1 if follow else None)
+    def log_view():
+        lines, matched = filter_lines(streams, pattern, min_level, LOG_DISPLAY_LINES)
+        for stream in streams:
+            if stream.error:
+                st.error(f"`{stream.label}`: {stream.error}")
+        buffered = sum(len(stream.lines()) for stream in streams)
+        restarts = sum(stream.restarts for stream in streams)
+        st.code("\n".join(lines) or "(no matching lines yet)", language=None)
+        st.caption(f"Showing {len(lines)} of {matched} matching lines · {buffered} buffered "
+                   f"(last {LOG_BUFFER_LINES} per stream){' · following' if follow else ''}"
+                   + (f" · re-followed {restarts}× after kubectl exited" if restarts else ""))
+    log_view()
+
+# --- Resource Usage (Top) ---
+@st.cache_resource
+def get_usage_store():
+    """Process-wide in-memory store of node and namespace usage series."""
+    return MetricStore(METRICS_CAPACITY)
+
+@st.cache_resource
+def get_metrics_sampler(context=None):
+    """One metrics-server sampler per kubectl context, shared by every session."""
+    return KubeMetricsSampler(get_usage_store(), context=context, interval=METRICS_INTERVAL).start()
+
+def build_usage_frame(samplers, group, metric, since):
+    """
+    Downsamples the `group` series of every sampler to the chart's resolution and
+    returns one long DataFrame, keeping only the TOP_SERIES busiest by latest value.
+    """
+    store = get_usage_store()
+    latest, frames = [], {}
+    for context, sampler in samplers.items():
+        for name in sampler.series_keys(group):
+            timestamps, values = store.series((context, group, name, metric)).snapshot(since=since)
+            if len(timestamps) == 0:
+                continue
+            label = f"{context or 'current'}/{name}" if len(samplers) > 1 else name
+            timestamps, values = downsample_lttb(timestamps, values, CHART_MAX_POINTS)
+            frames[label] = pd.DataFrame({"Time": pd.to_datetime(timestamps, unit="s", utc=True), "Value": values, "Series": label})
+            latest.append((values[-1], label))
+    busiest = [label for _, label in sorted(latest, reverse=True)[:TOP_SERIES]]
+    if not busiest:
+        return pd.DataFrame(columns=["Time", "Value", "Series"]), 0
+    return pd.concat([frames[label] for label in busiest], ignore_index=True), len(frames)
+
+def usage_chart(frame, title):
+    return alt.Chart(frame).mark_line().encode(
+        x=alt.X("Time:T", title="Time"),
+        y=alt.Y("Value:Q", title=title),
+        color=alt.Color("Series:N", title=None),
+        tooltip=["Series", "Time", alt.Tooltip("Value:Q", format=".3f")]
+    ).interactive()
+
+def render_top_view(contexts):
+    """Charts per-namespace (or per-node) CPU and memory over time from the sampled metrics."""
+    samplers = {context: get_metrics_sampler(context) for context in contexts}
+    t1, t2 = st.columns(2)
+    window_label = t1.selectbox("History window", list(TOP_WINDOWS), index=1, key="top_window")
+    group_label = t2.radio("Group by", ["Namespace", "Node"], horizontal=True, key="top_group")
+
+    @st.fragment(run_every=METRICS_INTERVAL)
+    def top_charts():
+        deadline = time.time() + CONTEXT_TIMEOUT
+        for context, sampler in samplers.items():
+            sampler.wait_for_sample(timeout=max(deadline - time.time(), 0))
+            if sampler.error:
+                st.warning(f"`{context or 'current'}`: metrics unavailable ({sampler.error}). Is metrics-server installed?")
+
+        since = time.time() - TOP_WINDOWS[window_label]
+        group = group_label.lower()
+        cpu, shown = build_usage_frame(samplers, group, "cpu", since)
+        memory, _ = build_usage_frame(samplers, group, "memory", since)
+        if cpu.empty:
+            st.info("Waiting for the first metrics-server sample...")
+            return
+        memory["Value"] = memory["Value"] / 2 ** 20
+
+        st.markdown(f"**CPU by {group}** (cores)")
+        st.altair_chart(usage_chart(cpu, "CPU (cores)"), use_container_width=True)
+        st.markdown(f"**Memory by {group}** (MiB)")
+        st.altair_chart(usage_chart(memory, "Memory (MiB)"), use_container_width=True)
+
+        pods = pd.DataFrame([
+            {"Cluster": context or "current", **row} for context, sampler in samplers.items() for row in sampler.pods
+        ])
+        if not pods.empty:
+            pods["Memory (MiB)"] = (pods.pop("Memory (bytes)") / 2 ** 20).round(1)
+            pods["CPU (cores)"] = pods["CPU (cores)"].round(3)
+            if len(samplers) == 1:
+                pods = pods.drop(columns="Cluster")
+            st.markdown("**Top pods** (latest sample)")
+            st.dataframe(pods.nlargest(TOP_SERIES, "CPU (cores)"), hide_index=True, use_container_width=True)
+
+        sampled = [s.sampled_at for s in samplers.values() if s.sampled_at]
+        st.caption(f"{min(shown, TOP_SERIES)} of {shown} {group}s charted · sampled every {METRICS_INTERVAL}s"
+                   + (f" · last sample {format_age(time.time() - max(sampled))} ago" if sampled else ""))
+    top_charts()
+
+def format_age(seconds):
+    """kubectl-style age: 45s, 12m, 5h, 17d."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(max(seconds, 0))}s"
+
+def render_resource_table(kind, contexts):
+    """Renders the cached resource lists of every selected cluster as one sortable, filterable table."""
+    rows, statuses = collect_rows(kind, contexts)
+    if len(statuses) > 1 or statuses[0]["Status"] != "OK":
+        st.dataframe(pd.DataFrame(statuses), hide_index=True, use_container_width=True)
+    if not rows:
+        if all(s["Status"] == "OK" for s in statuses):
+            st.info(f"No {kind} found.")
+        return
+
+    table = pd.DataFrame(rows)
+    f1, f2 = st.columns([1, 2])
+    if "Namespace" in table:
+        namespaces = ["All namespaces"] + sorted(table["Namespace"].unique())
+        namespace = f1.selectbox("Namespace", namespaces, key=f"{kind}_namespace")
+        if namespace != "All namespaces":
+            table = table[table["Namespace"] == namespace]
+    name_filter = f2.text_input("Filter by name", key=f"{kind}_filter")
+    if name_filter:
+        table = table[table["Name"].str.contains(name_filter, case=False, regex=False)]
+
+    # Creation time stays a real datetime so the column sorts correctly; it is only
+    # displayed as a relative age ("5 minutes ago"), worked out by the browser at render time
+    table["Created"] = pd.to_datetime(table["Created"], utc=True)
+    if len(contexts) == 1:
+        table = table.drop(columns="Cluster")
+    st.dataframe(
+        table.sort_values([c for c in ("Cluster", "Namespace", "Name") if c in table]),
+        column_config={"Created": st.column_config.DatetimeColumn("Age", format="distance")},
+        hide_index=True, use_container_width=True
+    )
+    st.caption(f"{len(table)} of {len(rows)} {kind} · kept current by a watch, no `kubectl` run per click")
+
 # --- Streamlit UI ---
+TOP_WINDOWS = {"15 minutes": 15 * 60, "1 hour": 60 * 60, "6 hours": 6 * 60 * 60, "24 hours": 24 * 60 * 60}
+
 st.info("Ensure your Minikube cluster is running. You can start it by opening Command Prompt and running `minikube start`.", icon="ℹ️")
 st.divider()
 
 st.subheader("Quick Actions")
 st.write("Run common `kubectl` commands with a single click.")
 
-col1, col2, col3, col4 = st.columns(4)
+all_contexts, current_context = get_contexts()
+if all_contexts:
+    selected_contexts = st.multiselect(
+        "Clusters (kubectl contexts)", all_contexts,
+        default=[current_context] if current_context in all_contexts else all_contexts[:1]
+    )
+else:
+    selected_contexts = []
+# Without a selection (or a readable kubeconfig) fall back to kubectl's current context
+contexts = tuple(selected_contexts) or (None,)
 
-quick_commands = {
-    "Get Pods": "kubectl get pods -o wide",
-    "Get Nodes": "kubectl get nodes",
-    "Get Services": "kubectl get services",
-    "Get Deployments": "kubectl get deployments"
-}
+col1, col2, col3, col4, col5 = st.columns(5)
+
+quick_views = {"Get Pods": "pods", "Get Nodes": "nodes", "Get Services": "services", "Get Deployments": "deployments", "Top": "top"}
 
 def run_and_display(command):
     with st.spinner(f"Running `{command}`..."):
@@ -57,14 +273,63 @@ def run_and_display(command):
         st.success(f"Output from `{command}`:")
         st.code(output, language="bash")
 
+# The selected view is remembered so filtering the table doesn't hide it again
 if col1.button("📦 Get Pods", use_container_width=True):
-    run_and_display(quick_commands["Get Pods"])
+    st.session_state["k8s_view"] = quick_views["Get Pods"]
 if col2.button("🖥️ Get Nodes", use_container_width=True):
-    run_and_display(quick_commands["Get Nodes"])
+    st.session_state["k8s_view"] = quick_views["Get Nodes"]
 if col3.button("🔌 Get Services", use_container_width=True):
-    run_and_display(quick_commands["Get Services"])
+    st.session_state["k8s_view"] = quick_views["Get Services"]
 if col4.button("🚀 Get Deployments", use_container_width=True):
-    run_and_display(quick_commands["Get Deployments"])
+    st.session_state["k8s_view"] = quick_views["Get Deployments"]
+if col5.button("📈 Top", use_container_width=True):
+    st.session_state["k8s_view"] = quick_views["Top"]
+
+if st.session_state.get("k8s_view") == "top":
+    render_top_view(contexts)
+elif "k8s_view" in st.session_state:
+    render_resource_table(st.session_state["k8s_view"], contexts)
+
+st.divider()
+
+st.subheader("Pod Logs")
+st.write("Follow logs from one or more pods; filtering happens on the dashboard server.")
+
+# The pod watch only starts once the viewer is opened, so the page never waits on an unreachable cluster
+if st.toggle("Open log viewer", key="show_logs"):
+    log_context = contexts[0]
+    if len(contexts) > 1:
+        log_context = st.selectbox("Cluster", contexts)
+    pod_cache = get_watch_cache("pods", log_context)
+    pod_rows = pod_cache.rows(timeout=0)
+    if pod_cache.error:
+        st.error(f"Could not list pods: {pod_cache.error}")
+    elif not pod_cache.synced:
+        st.caption("⏳ Loading pod list...")
+        st.button("🔄 Refresh pod list")
+    # Pods that were deleted after being selected stay listed so their stream's final lines and error remain visible
+    pod_names = sorted({f"{row['Namespace']}/{row['Name']}" for row in pod_rows} | set(st.session_state.get("log_pods", [])))
+
+    selected_pods = st.multiselect("Pods", pod_names, max_selections=MAX_LOG_STREAMS, key="log_pods")
+    l1, l2, l3 = st.columns([2, 1, 1])
+    log_pattern = l1.text_input("Regex filter", placeholder="e.g. timeout|refused")
+    log_level = l2.selectbox("Minimum level", ["All", "DEBUG", "INFO", "WARN", "ERROR"])
+    log_container = l3.text_input("Container", placeholder="all containers")
+    follow_logs = st.toggle("Follow", value=True)
+
+    pattern = None
+    if log_pattern:
+        try:
+            pattern = re.compile(log_pattern)
+        except re.error as e:
+            st.error(f"Invalid regex: {e}")
+
+    if selected_pods:
+        streams = []
+        for name in selected_pods:
+            namespace, pod = name.split("/", 1)
+            streams.append(get_log_stream(log_context, namespace, pod, log_container or None).ensure_running())
+        render_log_viewer(streams, pattern, None if log_level == "All" else log_level, follow_logs)
 
 st.divider()
 
@@ -2,51 +2,401 @@
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 import pandas as pd
 import altair as alt
+import numpy as np
+import time
 from datetime import datetime
+from metric_store import MetricStore, downsample_lttb
+from node_scrape import ScrapeHistory, scrape_node_exporter
+from proc_collector import ProcCollector
+from ssh_pool import get_ssh_pool
+from urllib.parse import urlsplit
+import paramiko
+from alert_rules import AlertRule, AlertEngine
+from anomaly_detection import build_aligned_frame, detect_anomalies
 
 # --- Page Configuration ---
 st.set_page_config(page_title="System Monitoring", page_icon="📈")
 st.title("📈 Live Host Monitoring Dashboard")
-st.markdown("This dashboard connects to a Prometheus server to display live metrics from your RHEL9 VM.")
+st.markdown("This dashboard connects to a Prometheus server to display live metrics from your RHEL9 VM. Hosts without Prometheus can be scraped directly through their node_exporter `/metrics` endpoint, or read agentlessly over SSH from `/proc`.")
 
 # --- Connection and Data Fetching ---
 PROMETHEUS_HOST = st.secrets.get("ssh_credentials", {}).get("host", "localhost")
 PROMETHEUS_URL = f"http://{PROMETHEUS_HOST}:9090"
+MAX_PARALLEL_QUERIES = 8
+SERIES_CAPACITY = 24 * 60 * 60 // 15  # 24 hours at the finest step
+# Ring files for every series live here, so history survives restarts
+METRIC_HISTORY_DIR = st.secrets.get("metric_history_dir", ".metric_history")
+CHART_MAX_POINTS = 800  # Roughly one point per horizontal pixel of the chart
+MAX_PARALLEL_TARGETS = 16  # Upper bound on in-flight requests across the fleet
+TARGET_TIMEOUT = 5  # Seconds before a fleet host is marked as timed out, counted from when its work starts
+FLEET_QUEUE_TIMEOUT = 3 * TARGET_TIMEOUT  # Hosts still waiting for a worker after this are shown as queued
+
+@st.cache_resource
+def get_http_session():
+    """Returns a process-wide requests session with a keep-alive connection pool."""
+    session = requests.Session()
+    # One small keep-alive pool per target host
+    adapter = HTTPAdapter(pool_connections=64, pool_maxsize=MAX_PARALLEL_QUERIES)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_prometheus_data(session, query, base_url=PROMETHEUS_URL, timeout=10):
+    """Fetches a single instant query from the Prometheus API."""
+    response = session.get(
+        f"{base_url}/api/v1/query",
+        params={'query': query},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    result = response.json()['data']['result']
+
+    data_points = []
+    for r in result:
+        if 'value' in r: # PromQL aggregations return a single 'value'
+            metric_name = query # Use the query as the metric name
+            val = r['value']
+            data_points.append([datetime.fromtimestamp(val[0]), float(val[1]), metric_name])
+
+    df = pd.DataFrame(data_points, columns=['Timestamp', 'Value', 'Metric'])
+    return df
 
 @st.cache_data(ttl=15) # Cache data for 15 seconds
-def fetch_prometheus_data(query):
-    """Fetches data from the Prometheus API."""
-    try:
-        response = requests.get(
-            f"{PROMETHEUS_URL}/api/v1/query",
-            params={'query': query}
-        )
-        response.raise_for_status()
-        result = response.json()['data']['result']
-        
-        data_points = []
-        for r in result:
-            if 'value' in r: # PromQL aggregations return a single 'value'
-                metric_name = query # Use the query as the metric name
-                val = r['value']
-                data_points.append([datetime.fromtimestamp(val[0]), float(val[1]), metric_name])
-        
-        df = pd.DataFrame(data_points, columns=['Timestamp', 'Value', 'Metric'])
-        return df
-    except requests.exceptions.RequestException as e:
+def fetch_prometheus_batch(queries):
+    """
+    Fetches several instant queries concurrently and returns a {query: DataFrame} map.
+    Duplicate queries are sent only once, so the page waits for the slowest query
+    rather than the sum of all of them.
+    """
+    unique_queries = list(dict.fromkeys(queries))
+    results = {}
+    connection_failed = False
+    # Resolve the shared session here; worker threads have no Streamlit context
+    session = get_http_session()
+
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_QUERIES, len(unique_queries) or 1)) as pool:
+        futures = {pool.submit(fetch_prometheus_data, session, query): query for query in unique_queries}
+        for future in as_completed(futures):
+            query = futures[future]
+            try:
+                results[query] = future.result()
+            except requests.exceptions.RequestException:
+                connection_failed = True
+                results[query] = pd.DataFrame()
+            except Exception:
+                st.warning(f"Could not fetch or process data for query: {query}")
+                results[query] = pd.DataFrame()
+
+    # Report once per batch instead of once per query
+    if connection_failed:
         st.error(f"Error connecting to Prometheus at {PROMETHEUS_URL}. Is it running and accessible?")
-        return pd.DataFrame()
-    except Exception as e:
-        st.warning(f"Could not fetch or process data for query: {query}")
-        return pd.DataFrame()
+    return results
+
+@st.cache_resource
+def get_metric_store():
+    """Process-wide columnar store of range-query series, shared by every session and persisted to disk."""
+    return MetricStore(SERIES_CAPACITY, directory=METRIC_HISTORY_DIR)
+
+def query_range(session, query, start, end, step_seconds):
+    """Runs one Prometheus `query_range` request; returns an (n, 2) array of samples, or None."""
+    response = session.get(
+        f"{PROMETHEUS_URL}/api/v1/query_range",
+        params={'query': query, 'start': start, 'end': end, 'step': step_seconds},
+        timeout=10
+    )
+    response.raise_for_status()
+    result = response.json()['data']['result']
+
+    # Aggregated queries return a single series in the matrix
+    if not result or not result[0]['values']:
+        return None
+    return np.asarray(result[0]['values'], dtype=np.float64)
+
+def fetch_range_delta(session, series, query, window_seconds, step_seconds, now):
+    """
+    Requests only the samples the series is missing from the Prometheus `query_range`
+    API: older history when the window reaches further back than any earlier fetch
+    (merged into the ring), and samples after the last stored timestamp (appended).
+    """
+    start = now - window_seconds
+    added = 0
+    first, last = series.first_timestamp(), series.last_timestamp()
+
+    if last is not None and (series.covered_from is None or start < series.covered_from):
+        # A shorter window (or another page) filled this series first; back-fill the rest
+        end = first - step_seconds
+        if start <= end:
+            samples = query_range(session, query, start, end, step_seconds)
+            if samples is not None:
+                added += series.merge(samples[:, 0], samples[:, 1])
+    if series.covered_from is None or start < series.covered_from:
+        series.covered_from = start
+
+    if last is not None:
+        start = max(start, last + step_seconds)
+    # Nothing new to ask for yet if the next step hasn't elapsed
+    if start > now:
+        return added
+
+    samples = query_range(session, query, start, now, step_seconds)
+    if samples is not None:
+        added += series.append(samples[:, 0], samples[:, 1])
+    return added
+
+def fetch_prometheus_range(queries, window_seconds, step_seconds):
+    """
+    Brings the stored series for each query up to date, fetching the deltas concurrently.
+    Returns a {query: (timestamps, values)} map covering the requested window.
+    """
+    unique_queries = list(dict.fromkeys(queries))
+    store = get_metric_store()
+    session = get_http_session()
+    now = time.time()
+    connection_failed = False
+
+    series = {query: store.series((PROMETHEUS_URL, query, step_seconds)) for query in unique_queries}
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_QUERIES, len(unique_queries) or 1)) as pool:
+        futures = {
+            pool.submit(fetch_range_delta, session, series[query], query, window_seconds, step_seconds, now): query
+            for query in unique_queries
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except requests.exceptions.RequestException:
+                connection_failed = True
+            except Exception:
+                st.warning(f"Could not fetch or process range data for query: {futures[future]}")
+
+    if connection_failed:
+        st.error(f"Error connecting to Prometheus at {PROMETHEUS_URL}. Is it running and accessible?")
+    return {query: series[query].snapshot(since=now - window_seconds) for query in unique_queries}
+
+# --- Multi-Host Fleet ---
+def load_inventory():
+    """Returns the default host inventory text from secrets, one `name url` pair per line."""
+    hosts = st.secrets.get("monitoring_hosts", [])
+    if not hosts:
+        return f"{PROMETHEUS_HOST} {PROMETHEUS_URL}"
+    return "\n".join(f"{h.get('name', h['url'])} {h['url']}" for h in hosts)
+
+def parse_inventory(text):
+    """
+    Parses inventory lines of the form `name url`, `url` or a bare hostname
+    (which is assumed to run Prometheus on port 9090). URLs ending in `/metrics`
+    are node_exporter endpoints scraped directly, and `ssh://[user@]host[:port]`
+    targets are read from /proc over SSH. Returns a tuple of (name, url).
+    """
+    targets = []
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts or parts[0].startswith("#"):
+            continue
+        name, url = (parts[0], parts[1]) if len(parts) > 1 else (parts[0], parts[0])
+        if "://" not in url:
+            url = f"http://{url}:9090"
+        targets.append((name, url.rstrip("/")))
+    return tuple(dict.fromkeys(targets))
+
+@st.cache_resource
+def get_scrape_history():
+    """Previous node_exporter counters per target, used to compute rates between scrapes."""
+    return ScrapeHistory()
+
+# Maps the tile metrics onto the values computed from a direct node_exporter scrape
+SCRAPE_METRICS = {
+    "Host CPU Usage (%)": "cpu_percent",
+    "Host Memory Usage (%)": "memory_percent",
+    "Root FS Usage (%)": "root_fs_percent"
+}
+
+# Counter rates reported by /proc collection, shown as extra grid columns
+RATE_COLUMNS = {
+    "net_recv_bps": "Net In (KB/s)",
+    "net_sent_bps": "Net Out (KB/s)",
+    "disk_read_bps": "Disk Read (KB/s)",
+    "disk_write_bps": "Disk Write (KB/s)"
+}
+
+def is_scrape_target(url):
+    return url.endswith("/metrics")
+
+def is_ssh_target(url):
+    return url.startswith("ssh://")
+
+@st.cache_resource
+def get_proc_collector(url):
+    """
+    One long-lived /proc collector per `ssh://` target. The user and password default to
+    `[ssh_credentials]` in secrets, like the SSH page.
+    """
+    parts = urlsplit(url)
+    credentials = st.secrets.get("ssh_credentials", {})
+    return ProcCollector(
+        get_ssh_pool(), parts.hostname, parts.port or 22,
+        parts.username or credentials.get("username", ""), credentials.get("password", ""),
+        timeout=TARGET_TIMEOUT
+    )
+
+def collect_proc_usage(collector, url, history):
+    """Reads /proc once over the collector's channel and returns usage like a direct scrape."""
+    timestamp, totals = collector.sample()
+    return history.usage(url, totals, timestamp)
+
+def record_usage(url, usage, metric_queries, step_seconds):
+    """
+    Appends a directly collected sample to the metric store, one point per step, under
+    the same (url, query, step) keys Prometheus series use, so it is charted and scored too.
+    """
+    store = get_metric_store()
+    timestamp = [time.time() // step_seconds * step_seconds]
+    for metric_name, query in metric_queries:
+        value = usage.get(SCRAPE_METRICS.get(metric_name))
+        if value is not None:
+            store.series((url, query, step_seconds)).append(timestamp, [value])
+    for rate_name in RATE_COLUMNS:
+        if usage.get(rate_name) is not None:
+            store.series((url, rate_name, step_seconds)).append(timestamp, [usage[rate_name]])
+
+@st.cache_resource
+def get_fanout_pool():
+    """Process-wide worker pool that bounds how many fleet requests run at once."""
+    return ThreadPoolExecutor(max_workers=MAX_PARALLEL_TARGETS, thread_name_prefix="fleet")
+
+def fetch_prometheus_host(session, url, metric_queries):
+    """Runs one host's instant queries back to back within a shared TARGET_TIMEOUT; returns {metric: latest value}."""
+    deadline = time.time() + TARGET_TIMEOUT
+    values = {}
+    for metric_name, query in metric_queries:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise requests.exceptions.Timeout(f"{url} did not answer within {TARGET_TIMEOUT}s")
+        df = fetch_prometheus_data(session, query, url, remaining)
+        values[metric_name] = df['Value'].iloc[-1] if not df.empty else None
+    return values
+
+def run_host_task(started_at, name, task, *args):
+    """Records when a host's work actually leaves the queue, so its timeout excludes queue time."""
+    started_at[name] = time.time()
+    return task(*args)
+
+@st.cache_data(ttl=15) # Cache data for 15 seconds
+def fetch_fleet_grid(targets, metric_queries, step_seconds):
+    """
+    Collects every host concurrently, one task per host, and aggregates the latest values
+    into a host-by-metric DataFrame. node_exporter targets are scraped, SSH targets read
+    from /proc and Prometheus targets queried. Each host's TARGET_TIMEOUT starts when its
+    task starts, so a slow host only blanks its own row; hosts still waiting for a worker
+    after FLEET_QUEUE_TIMEOUT are reported as queued and this run's queued tasks are cancelled.
+    """
+    session = get_http_session()
+    pool = get_fanout_pool()
+    history = get_scrape_history()
+    started = time.time()
+
+    started_at = {}
+    futures = {}
+    for name, url in targets:
+        if is_ssh_target(url):
+            future = pool.submit(run_host_task, started_at, name, collect_proc_usage, get_proc_collector(url), url, history)
+        elif is_scrape_target(url):
+            future = pool.submit(run_host_task, started_at, name, scrape_node_exporter, session, url, history, TARGET_TIMEOUT)
+        else:
+            future = pool.submit(run_host_task, started_at, name, fetch_prometheus_host, session, url, metric_queries)
+        futures[future] = name
+
+    pending = set(futures)
+    while pending:
+        now = time.time()
+        # A running host gets TARGET_TIMEOUT from its own start; a queued one waits at most FLEET_QUEUE_TIMEOUT
+        pending = {
+            f for f in pending
+            if now < (started_at[futures[f]] + TARGET_TIMEOUT + 1 if futures[f] in started_at else started + FLEET_QUEUE_TIMEOUT)
+        }
+        if pending:
+            wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            pending = {f for f in pending if not f.done()}
+
+    rows = {name: {"Host": name, "URL": url, "Status": "OK"} for name, url in targets}
+    for future, name in futures.items():
+        row = rows[name]
+        if not future.done():
+            # Only work that never started is cancelled; a running task finishes on its own timeout
+            row["Status"] = "Queued" if future.cancel() else "Timed out"
+            continue
+        try:
+            usage = future.result()
+            if not is_ssh_target(row["URL"]) and not is_scrape_target(row["URL"]):
+                row.update(usage)
+                continue
+            # Direct scrape or /proc read: one result carries every metric for the host
+            for tile_name, _ in metric_queries:
+                row[tile_name] = usage.get(SCRAPE_METRICS.get(tile_name))
+            for rate_name, column in RATE_COLUMNS.items():
+                if usage.get(rate_name) is not None:
+                    row[column] = usage[rate_name] / 1024
+            record_usage(row["URL"], usage, metric_queries, step_seconds)
+        except requests.exceptions.Timeout:
+            row["Status"] = "Timed out"
+        except requests.exceptions.RequestException:
+            row["Status"] = "Unreachable"
+        except TimeoutError:
+            row["Status"] = "Timed out"
+        except paramiko.AuthenticationException:
+            row["Status"] = "Auth failed"
+        except (paramiko.SSHException, EOFError, OSError):
+            row["Status"] = "Unreachable"
+        except Exception:
+            row["Status"] = "Bad response"
+
+    rate_columns = [c for c in RATE_COLUMNS.values() if any(c in row for row in rows.values())]
+    columns = ["Host", "Status"] + [m for m, _ in metric_queries] + rate_columns + ["URL"]
+    grid = pd.DataFrame(list(rows.values()), columns=columns)
+    return grid, time.time() - started
+
+def build_chart_frame(timestamps, values, metric_name, max_points=CHART_MAX_POINTS):
+    """Downsamples a series to the chart's resolution and wraps it in a DataFrame for Altair."""
+    timestamps, values = downsample_lttb(timestamps, values, max_points)
+    return pd.DataFrame({
+        'Timestamp': pd.to_datetime(timestamps, unit='s', utc=True),
+        'Value': values,
+        'Metric': metric_name
+    })
 
 # --- Streamlit UI ---
-st.info(f"Connecting to Prometheus server at `{PROMETHEUS_URL}`. Refresh the page to update data.", icon="ℹ️")
+RANGE_WINDOWS = {"15 minutes": 15 * 60, "1 hour": 60 * 60, "6 hours": 6 * 60 * 60, "24 hours": 24 * 60 * 60}
+RANGE_STEPS = {"15 s": 15, "30 s": 30, "1 min": 60, "5 min": 300}
 
-# --- Key Metrics Display ---
-st.subheader("RHEL9 Host Metrics")
+with st.sidebar:
+    st.subheader("Chart Settings")
+    window_label = st.selectbox("History window", list(RANGE_WINDOWS.keys()), index=1)
+    step_label = st.selectbox("Resolution (step)", list(RANGE_STEPS.keys()), index=0)
+    live_mode = st.toggle("Live mode", value=False, help="Re-render only the tiles and chart once per step, fetching just the new samples.")
+    st.subheader("Host Inventory")
+    inventory_text = st.text_area(
+        "Targets (`name url` per line)",
+        value=load_inventory(),
+        height=120,
+        help="Use a Prometheus URL, a node_exporter URL ending in `/metrics` to scrape it directly, "
+             "or `ssh://user@host` to read /proc over SSH (password from `[ssh_credentials]`)."
+    )
+    st.subheader("Anomaly Detection")
+    show_anomalies = st.toggle("Highlight anomalies", value=True)
+    anomaly_threshold = st.slider("Z-score threshold", min_value=2.0, max_value=6.0, value=3.5, step=0.5)
+
+window_seconds = RANGE_WINDOWS[window_label]
+step_seconds = RANGE_STEPS[step_label]
+# In live mode the fragments below rerun on their own every step; otherwise they run with the page
+refresh_every = step_seconds if live_mode else None
+
+if live_mode:
+    st.info(f"Connecting to Prometheus server at `{PROMETHEUS_URL}`. Live mode: updating every {step_label}.", icon="ℹ️")
+else:
+    st.info(f"Connecting to Prometheus server at `{PROMETHEUS_URL}`. Refresh the page to update data.", icon="ℹ️")
 
 # --- CORRECTED QUERIES FOR NODE EXPORTER ---
 queries = {
@@ -55,38 +405,189 @@ queries = {
     "Root FS Usage (%)": '((node_filesystem_size_bytes{mountpoint="/"} - node_filesystem_free_bytes{mountpoint="/"}) / node_filesystem_size_bytes{mountpoint="/"}) * 100'
 }
 
-cols = st.columns(len(queries))
+# --- Alert Rules ---
+DEFAULT_ALERT_RULES = [
+    {"name": "High CPU", "metric": "Host CPU Usage (%)", "op": ">", "threshold": 90, "for_minutes": 5, "severity": "critical"},
+    {"name": "High Memory", "metric": "Host Memory Usage (%)", "op": ">", "threshold": 90, "for_minutes": 5, "severity": "warning"},
+    {"name": "Root FS Almost Full", "metric": "Root FS Usage (%)", "op": ">", "threshold": 85, "for_minutes": 0, "severity": "warning"}
+]
+# The engine's state is shared by every session, so it always reads the finest-step series
+# whatever resolution a session is charting
+ALERT_STEP_SECONDS = min(RANGE_STEPS.values())
+
+@st.cache_resource
+def get_alert_engine():
+    """Process-wide alert engine; rules come from `[[alert_rules]]` in secrets if present."""
+    rules = st.secrets.get("alert_rules", DEFAULT_ALERT_RULES)
+    return AlertEngine([
+        AlertRule(r["name"], r["metric"], r.get("op", ">"), r["threshold"], r.get("for_minutes", 0) * 60, r.get("severity", "warning"))
+        for r in rules
+    ])
 
-for col, (metric_name, query) in zip(cols, queries.items()):
-    df = fetch_prometheus_data(query)
-    if not df.empty:
-        latest_value = df['Value'].iloc[-1]
-        col.metric(metric_name, f"{latest_value:.2f}%")
+@st.fragment(run_every=refresh_every)
+def render_alerts():
+    """Pulls new finest-step samples for every tile metric and feeds only those into the alert rules."""
+    engine = get_alert_engine()
+    # Enough history to cover the longest `for` duration
+    alert_window = max((rule.for_seconds for rule in engine.rules), default=0) + 5 * 60
+    fetch_prometheus_range(tuple(queries.values()), alert_window, ALERT_STEP_SECONDS)
+    store = get_metric_store()
+    series_by_metric = {
+        metric_name: store.series((PROMETHEUS_URL, query, ALERT_STEP_SECONDS))
+        for metric_name, query in queries.items()
+    }
+    firing = engine.evaluate(series_by_metric)
+
+    for alert in firing:
+        rule = alert["rule"]
+        since = datetime.fromtimestamp(alert["since"]).strftime("%H:%M:%S")
+        message = f"**{rule.name}** — {rule.describe()} (now {alert['value']:.1f}, since {since})"
+        if rule.severity == "critical":
+            st.error(message, icon="🚨")
+        else:
+            st.warning(message, icon="⚠️")
+
+    events = engine.events()
+    with st.expander(f"🔔 Notifications ({len(firing)} firing)", expanded=False):
+        if events:
+            notifications = pd.DataFrame(events)
+            notifications["Time"] = pd.to_datetime(notifications["Time"], unit="s", utc=True)
+            st.dataframe(notifications, hide_index=True, use_container_width=True)
+        else:
+            st.write("No alerts have fired yet.")
+
+render_alerts()
+
+# --- Key Metrics Display ---
+@st.fragment(run_every=refresh_every)
+def render_metric_tiles():
+    """Shows the latest value of each query; in live mode only the new samples are fetched."""
+    cols = st.columns(len(queries))
+    if live_mode:
+        series = fetch_prometheus_range(tuple(queries.values()), window_seconds, step_seconds)
+        latest = {query: values[-1] if len(values) else None for query, (_, values) in series.items()}
     else:
-        col.metric(metric_name, "N/A")
+        results = fetch_prometheus_batch(tuple(queries.values()))
+        latest = {query: df['Value'].iloc[-1] if not df.empty else None for query, df in results.items()}
 
-st.divider()
+    for col, (metric_name, query) in zip(cols, queries.items()):
+        if latest[query] is not None:
+            col.metric(metric_name, f"{latest[query]:.2f}%")
+        else:
+            col.metric(metric_name, "N/A")
+
+# --- Anomaly Detection ---
+# Metrics scored on how fast they change rather than on their level
+RATE_METRICS = ("Root FS Usage (%)",)
+
+def find_anomalies():
+    """
+    Scores every stored series at the current step (all metrics, all Prometheus hosts)
+    in one vectorized EWMA/z-score pass. Returns {series label: DataFrame of anomalies}.
+    """
+    store = get_metric_store()
+    metric_by_query = {**RATE_COLUMNS, **{query: metric_name for metric_name, query in queries.items()}}
+    since = time.time() - window_seconds
+
+    series_map = {}
+    for url, query, step in store.keys():
+        if step != step_seconds:
+            continue
+        label = metric_by_query.get(query, query)
+        if url != PROMETHEUS_URL:
+            label = f"{label} @ {url}"
+        series_map[label] = store.series((url, query, step)).snapshot(since=since)
+
+    frame = build_aligned_frame(series_map, step_seconds)
+    rate_columns = [label for label in frame.columns if label.split(" @ ")[0] in RATE_METRICS]
+    _, mask = detect_anomalies(frame, threshold=anomaly_threshold, rate_columns=rate_columns)
+
+    anomalies = {}
+    for label in frame.columns[mask.any(axis=0).to_numpy()]:
+        hits = frame.loc[mask[label], label]
+        anomalies[label] = pd.DataFrame({
+            'Timestamp': pd.to_datetime(hits.index, unit='s', utc=True),
+            'Value': hits.to_numpy()
+        })
+    return anomalies
 
 # --- Time-Series Chart ---
+@st.fragment(run_every=refresh_every)
+def render_cpu_chart():
+    """Draws the CPU history from the metric store after pulling any new samples."""
+    query = queries["Host CPU Usage (%)"]
+    # Refresh every tile series so the anomaly pass sees all of them
+    series = fetch_prometheus_range(tuple(queries.values()), window_seconds, step_seconds)
+    cpu_ts, cpu_values = series[query]
+    cpu_df = build_chart_frame(cpu_ts, cpu_values, "Host CPU Usage (%)")
+    anomalies = find_anomalies() if show_anomalies else {}
+
+    if not cpu_df.empty:
+        chart = alt.Chart(cpu_df).mark_area(
+            line={'color': '#00d4ff'},
+            color=alt.Gradient(
+                gradient='linear',
+                stops=[alt.GradientStop(color='rgba(0, 212, 255, 0.5)', offset=1),
+                       alt.GradientStop(color='rgba(0, 212, 255, 0)', offset=0)],
+                x1=1, x2=1, y1=1, y2=0
+            )
+        ).encode(
+            x=alt.X('Timestamp:T', title='Time'),
+            y=alt.Y('Value:Q', title='CPU Usage (%)', scale=alt.Scale(domain=[0, 100])),
+            tooltip=['Timestamp', 'Value']
+        )
+
+        cpu_anomalies = anomalies.get("Host CPU Usage (%)")
+        if cpu_anomalies is not None:
+            points = alt.Chart(cpu_anomalies).mark_point(color='#ff4b4b', filled=True, size=60).encode(
+                x='Timestamp:T',
+                y='Value:Q',
+                tooltip=['Timestamp', 'Value']
+            )
+            chart = chart + points
+
+        st.altair_chart(chart.interactive(), use_container_width=True)
+    else:
+        st.warning("No CPU data to display.")
+
+    if anomalies:
+        summary = ", ".join(f"{label}: {len(df)}" for label, df in anomalies.items())
+        st.caption(f"🔴 Anomalies in this window — {summary}")
+
+st.subheader("RHEL9 Host Metrics")
+render_metric_tiles()
+
+st.divider()
+
 st.subheader("CPU Usage Over Time")
+render_cpu_chart()
 
-cpu_df = fetch_prometheus_data(queries["Host CPU Usage (%)"])
+st.divider()
 
-if not cpu_df.empty:
-    chart = alt.Chart(cpu_df).mark_area(
-        line={'color': '#00d4ff'},
-        color=alt.Gradient(
-            gradient='linear',
-            stops=[alt.GradientStop(color='rgba(0, 212, 255, 0.5)', offset=1),
-                   alt.GradientStop(color='rgba(0, 212, 255, 0)', offset=0)],
-            x1=1, x2=1, y1=1, y2=0
-        )
-    ).encode(
-        x=alt.X('Timestamp:T', title='Time'),
-        y=alt.Y('Value:Q', title='CPU Usage (%)', scale=alt.Scale(domain=[0, 100])),
-        tooltip=['Timestamp', 'Value']
-    ).interactive()
-    
-    st.altair_chart(chart, use_container_width=True)
-else:
-    st.warning("No CPU data to display.")
\ No newline at end of file
+# --- Fleet Overview ---
+@st.fragment(run_every=refresh_every)
+def render_fleet_grid():
+    """Shows the latest value of every tile metric for every host in the inventory."""
+    targets = parse_inventory(inventory_text)
+    if not targets:
+        st.info("Add at least one target to the host inventory in the sidebar.")
+        return
+
+    grid, elapsed = fetch_fleet_grid(targets, tuple(queries.items()), step_seconds)
+    st.dataframe(
+        grid,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            **{column: st.column_config.NumberColumn(column, format="%.1f") for column in RATE_COLUMNS.values()},
+            **{
+                metric_name: st.column_config.ProgressColumn(metric_name, min_value=0, max_value=100, format="%.1f%%")
+                for metric_name in queries
+            }
+        }
+    )
+    healthy = int((grid["Status"] == "OK").sum())
+    st.caption(f"{healthy}/{len(grid)} hosts responded · fan-out took {elapsed:.2f}s")
+
+st.subheader("Fleet Overview")
+render_fleet_grid()
@@ -29,24 +29,28 @@ except Exception as e:
 
 # Core function
 def calmpulsellm(myprompt):
+    """Streams the model's reply token by token."""
     mymsg = [
         {"role": "system", "content": "you are AI assistant work like a mental health peace & give motivation , reply in 3 lines"},
         {"role": "user", "content": myprompt}
     ]
-    response = gemini_model.chat.completions.create(model="gemini-2.5-flash", messages=mymsg)
-    return response.choices[0].message.content
+    stream = gemini_model.chat.completions.create(model="gemini-2.5-flash", messages=mymsg, stream=True)
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
 
 # Input from user
 user_input = st.text_area("💭 How are you feeling today?", height=150)
 
 if st.button("🧘 Get Supportive Advice"):
     if user_input.strip() != "":
-        with st.spinner("Sending calm vibes..."):
-            try:
-                response = calmpulsellm(user_input)
-                st.success("Here's a calming message for you:")
-                st.write(f"💬 *{response}*")
-            except Exception as e:
-                st.error(f"An error occurred while getting advice: {e}")
+        try:
+            # Filled in only once the reply has streamed, so a failed request shows just the error
+            banner = st.empty()
+            with st.chat_message("assistant", avatar="🧘"):
+                st.write_stream(calmpulsellm(user_input))
+            banner.success("Here's a calming message for you:")
+        except Exception as e:
+            st.error(f"An error occurred while getting advice: {e}")
     else:
         st.warning("Please type something so I can help you.")
\ No newline at end of file
@@ -0,0 +1,131 @@
+# proc_collector.py
+
+import re
+import threading
+import time
+import paramiko
+
+# --- Remote Loop ---
+# Started once per host on a long-lived exec channel. Every newline we send makes it
+# dump all the files in one batch, so a sample costs one round-trip, not one per file.
+PROC_FILES = ("/proc/stat", "/proc/meminfo", "/proc/net/dev", "/proc/diskstats")
+END_MARKER = "@@end"
+PROC_LOOP_SCRIPT = (
+    "while read -r _; do "
+    f"for f in {' '.join(PROC_FILES)}; do echo \"@@ $f\"; cat \"$f\"; done; "
+    "echo '@@ df'; df -Pk / | tail -n 1; "
+    f"echo '{END_MARKER}'; "
+    "done"
+)
+
+# Partitions and virtual devices are skipped so disk I/O isn't counted twice
+_SKIPPED_DISK_PREFIXES = ("loop", "ram", "dm-", "sr", "zram")
+_NUMBERED_DISK = re.compile(r"^(nvme\d+n\d+|mmcblk\d+)$")  # Whole disks whose names end in a digit
+
+def _is_whole_disk(name):
+    if name.startswith(_SKIPPED_DISK_PREFIXES):
+        return False
+    return bool(_NUMBERED_DISK.match(name)) or not name[-1].isdigit()
+
+
+# --- Parser ---
+def parse_proc_snapshot(lines):
+    """
+    Reduces one batch of `@@ <file>`-delimited /proc output to the same raw totals
+    node_exporter scrapes produce (see node_scrape.summarize_node_samples), plus
+    network and disk byte counters.
+    """
+    totals = {"cpu_idle": 0.0, "cpu_total": 0.0, "mem_total": None, "mem_available": None,
+              "fs_size": None, "fs_free": None, "net_rx_bytes": 0.0, "net_tx_bytes": 0.0,
+              "disk_read_bytes": 0.0, "disk_write_bytes": 0.0}
+    section = None
+    for line in lines:
+        if line.startswith("@@ "):
+            section = line[3:].strip()
+            continue
+        fields = line.split()
+        if not fields:
+            continue
+
+        try:
+            if section == "/proc/stat" and fields[0] == "cpu":
+                # user nice system idle iowait irq softirq steal (guest time is already in user)
+                jiffies = [float(v) for v in fields[1:9]]
+                totals["cpu_total"] = sum(jiffies)
+                totals["cpu_idle"] = sum(jiffies[3:5])
+            elif section == "/proc/meminfo" and fields[0] in ("MemTotal:", "MemAvailable:"):
+                key = "mem_total" if fields[0] == "MemTotal:" else "mem_available"
+                totals[key] = float(fields[1]) * 1024
+            elif section == "/proc/net/dev" and ":" in line and "|" not in line:
+                name, _, counters = line.partition(":")
+                if name.strip() != "lo":
+                    counters = counters.split()
+                    totals["net_rx_bytes"] += float(counters[0])
+                    totals["net_tx_bytes"] += float(counters[8])
+            elif section == "/proc/diskstats" and len(fields) >= 10 and _is_whole_disk(fields[2]):
+                # Sectors are always 512 bytes in diskstats
+                totals["disk_read_bytes"] += float(fields[5]) * 512
+                totals["disk_write_bytes"] += float(fields[9]) * 512
+            elif section == "df" and len(fields) >= 4:
+                size, used = float(fields[1]) * 1024, float(fields[2]) * 1024
+                totals["fs_size"], totals["fs_free"] = size, size - used
+        except (IndexError, ValueError):
+            continue
+    return totals
+
+
+# --- Persistent Collector ---
+class ProcCollector:
+    """
+    Collects /proc metrics from one host over a single long-lived SSH channel taken
+    from an SSHConnectionPool. The channel is reopened once if it has died.
+    """
+
+    def __init__(self, pool, host, port, username, password, timeout=5):
+        self.pool = pool
+        self.host, self.port, self.username, self.password = host, int(port), username, password
+        self.timeout = timeout
+        self._stdin = self._stdout = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._stdin, self._stdout, _ = self.pool.open_channel(
+            self.host, self.port, self.username, self.password, PROC_LOOP_SCRIPT
+        )
+        self._stdout.channel.settimeout(self.timeout)
+
+    def _read_batch(self):
+        lines = []
+        while True:
+            line = self._stdout.readline()
+            if not line:
+                raise EOFError("remote /proc loop exited")
+            line = line.rstrip("\n")
+            if line == END_MARKER:
+                return lines
+            lines.append(line)
+
+    def sample(self):
+        """Returns (timestamp, totals) for one batched read of every /proc file."""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._stdout is None:
+                        self._open()
+                    self._stdin.write("\n")
+                    self._stdin.flush()
+                    lines = self._read_batch()
+                    return time.time(), parse_proc_snapshot(lines)
+                except (paramiko.AuthenticationException, TimeoutError):
+                    # Neither gets better on a second try; a late reply would also desync the stream
+                    self.close()
+                    raise
+                except (paramiko.SSHException, EOFError, OSError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    def close(self):
+        if self._stdout is not None:
+            self._stdout.channel.close()
+        self._stdin = self._stdout = None
@@ -0,0 +1,92 @@
+# sftp_browser.py
+
+import posixpath
+import stat
+import threading
+import time
+
+# --- Remote Directory Browser ---
+class RemoteBrowser:
+    """
+    Lazily browses remote filesystems over SFTP. Each directory costs a single
+    `listdir_attr` round-trip and the result is cached for `ttl` seconds; callers
+    invalidate a directory after writing into it. One SFTP session per connection is
+    kept open between page reruns.
+    """
+
+    def __init__(self, pool, ttl=30):
+        self.pool = pool
+        self.ttl = ttl
+        self._listings = {}  # (connection key, path) -> (fetched_at, entries)
+        self._sessions = {}  # connection key -> (SFTPClient, lock)
+        self._lock = threading.Lock()
+
+    def _session(self, host, port, username, password):
+        key = self.pool.connection_key(host, port, username, password)
+        with self._lock:
+            sftp, lock = self._sessions.setdefault(key, (None, threading.Lock()))
+        if sftp is None or sftp.get_channel().closed:
+            # Opened under this connection's lock only, so a slow host never stalls other users' browsing
+            with lock:
+                sftp, _ = self._sessions[key]
+                if sftp is None or sftp.get_channel().closed:
+                    sftp = self.pool.open_sftp(host, port, username, password)
+                    with self._lock:
+                        self._sessions[key] = (sftp, lock)
+        return key, sftp, lock
+
+    def listdir(self, host, port, username, password, path):
+        """
+        Returns the entries of `path` (directories first, then by name) as dicts with
+        name, path, kind ("dir", "file" or "link"), size and mtime.
+        """
+        path = posixpath.normpath(path)
+        key, sftp, lock = self._session(host, port, username, password)
+        with self._lock:
+            cached = self._listings.get((key, path))
+        if cached and time.time() - cached[0] < self.ttl:
+            return cached[1]
+
+        with lock:
+            attributes = sftp.listdir_attr(path)
+        entries = []
+        for attr in attributes:
+            mode = attr.st_mode or 0
+            kind = "dir" if stat.S_ISDIR(mode) else "link" if stat.S_ISLNK(mode) else "file"
+            entries.append({
+                "name": attr.filename, "path": posixpath.join(path, attr.filename), "kind": kind,
+                "size": attr.st_size or 0, "mtime": attr.st_mtime or 0
+            })
+        entries.sort(key=lambda e: (e["kind"] != "dir", e["name"]))
+        with self._lock:
+            self._listings[(key, path)] = (time.time(), entries)
+        return entries
+
+    def is_dir(self, host, port, username, password, path):
+        """Follows symlinks; used when a `link` entry is opened."""
+        _, sftp, lock = self._session(host, port, username, password)
+        with lock:
+            return stat.S_ISDIR(sftp.stat(path).st_mode or 0)
+
+    def preview(self, host, port, username, password, path, max_bytes, from_end=False):
+        """
+        Reads at most `max_bytes` from the start (or end) of a remote file with a single
+        ranged read. Returns (data, file_size).
+        """
+        _, sftp, lock = self._session(host, port, username, password)
+        with lock:
+            with sftp.open(path, "rb") as remote:
+                size = remote.stat().st_size
+                if from_end and size > max_bytes:
+                    remote.seek(size - max_bytes)
+                return remote.read(max_bytes), size
+
+    def invalidate(self, host, port, username, password, path=None):
+        """Drops the cached listing of `path` (or every listing for the connection)."""
+        key = self.pool.connection_key(host, port, username, password)
+        if path is not None:
+            path = posixpath.normpath(path)
+        with self._lock:
+            for cached_key in list(self._listings):
+                if cached_key[0] == key and path in (None, cached_key[1]):
+                    del self._listings[cached_key]
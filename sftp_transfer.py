@@ -0,0 +1,153 @@
+# sftp_transfer.py
+
+import os
+import threading
+import time
+
+CHUNK_SIZE = 256 * 1024          # Local read size; paramiko splits it into pipelined 32 KB requests
+PREFETCH_REQUESTS = 64           # Outstanding read requests per download (bounds buffered data)
+PART_SUFFIX = ".part"            # Unfinished transfers live here until renamed into place
+SOURCE_SUFFIX = ".part.source"   # Size and mtime of the file a .part was copied from
+
+# --- Progress Tracking ---
+class TransferProgress:
+    """
+    Thread-safe progress counters for a batch of transfers. Workers report bytes as
+    they go; the page polls snapshot() to draw progress and throughput.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def add(self, task, label):
+        with self._lock:
+            self._tasks[task] = {"File": label, "Status": "queued", "Size": 0, "Done": 0, "Resumed": 0, "Error": ""}
+
+    def start(self, task, size, resumed):
+        with self._lock:
+            self._tasks[task].update(Status="running", Size=size, Done=resumed, Resumed=resumed)
+
+    def advance(self, task, count):
+        with self._lock:
+            self._tasks[task]["Done"] += count
+
+    def finish(self, task, status, error=""):
+        with self._lock:
+            self._tasks[task].update(Status=status, Error=error)
+
+    def snapshot(self):
+        """Returns (rows, bytes moved this run, total bytes)."""
+        with self._lock:
+            rows = [dict(row) for row in self._tasks.values()]
+        moved = sum(row["Done"] - row["Resumed"] for row in rows)
+        total = sum(row["Size"] for row in rows)
+        return rows, moved, total
+
+
+# --- Transfers ---
+def _copy(source, target, progress, task):
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        target.write(chunk)
+        if progress:
+            progress.advance(task, len(chunk))
+
+
+def _remote_size(sftp, path):
+    try:
+        return sftp.stat(path).st_size
+    except FileNotFoundError:
+        return None
+
+
+def _source_id(stat):
+    return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def upload_file(sftp, local_path, remote_path, progress=None, task=None):
+    """
+    Uploads `local_path` to `remote_path` with pipelined writes. Data goes to
+    `remote_path.part` first; an existing partial file is resumed from its size
+    if the source's size and mtime still match those recorded when it was started.
+    """
+    stat = os.stat(local_path)
+    size = stat.st_size
+    part, marker = remote_path + PART_SUFFIX, remote_path + SOURCE_SUFFIX
+    offset = _remote_size(sftp, part) or 0
+    if offset:
+        # Only resume a partial copied from this exact version of the source
+        try:
+            with sftp.open(marker, "rb") as f:
+                recorded = f.read().decode("utf-8", "replace")
+        except IOError:
+            recorded = None
+        if recorded != _source_id(stat) or offset > size:
+            offset = 0
+    if not offset:
+        with sftp.open(marker, "wb") as f:
+            f.write(_source_id(stat).encode("utf-8"))
+    if progress:
+        progress.start(task, size, offset)
+
+    with open(local_path, "rb") as source, sftp.open(part, "r+b" if offset else "wb") as target:
+        # Don't wait for an ack per write; errors surface on close
+        target.set_pipelined(True)
+        source.seek(offset)
+        target.seek(offset)
+        _copy(source, target, progress, task)
+
+    if sftp.stat(part).st_size != size:
+        raise IOError(f"size mismatch after uploading {local_path}")
+    try:
+        sftp.posix_rename(part, remote_path)
+    except IOError:
+        # Servers without the posix-rename extension refuse to overwrite
+        if _remote_size(sftp, remote_path) is not None:
+            sftp.remove(remote_path)
+        sftp.rename(part, remote_path)
+    sftp.remove(marker)
+    return size - offset
+
+
+def download_file(sftp, remote_path, local_path, progress=None, task=None):
+    """
+    Downloads `remote_path` straight to disk with prefetched (pipelined) reads, so large
+    files never sit in memory. Resumes from an existing `local_path.part` copied
+    from the same version of the remote file.
+    """
+    stat = sftp.stat(remote_path)
+    size = stat.st_size
+    part, marker = local_path + PART_SUFFIX, local_path + SOURCE_SUFFIX
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    if offset:
+        # Only resume a partial copied from this exact version of the source (logs rotate)
+        try:
+            with open(marker, encoding="utf-8") as f:
+                recorded = f.read()
+        except OSError:
+            recorded = None
+        if recorded != _source_id(stat) or offset > size:
+            offset = 0
+    if not offset:
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(_source_id(stat))
+    if progress:
+        progress.start(task, size, offset)
+
+    with sftp.open(remote_path, "rb") as source, open(part, "r+b" if offset else "wb") as target:
+        source.seek(offset)
+        target.seek(offset)
+        target.truncate()
+        source.prefetch(size, max_concurrent_requests=PREFETCH_REQUESTS)
+        _copy(source, target, progress, task)
+
+    if os.path.getsize(part) != size:
+        raise IOError(f"size mismatch after downloading {remote_path}")
+    os.replace(part, local_path)
+    os.remove(marker)
+    return size - offset
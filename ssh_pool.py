@@ -0,0 +1,276 @@
+# ssh_pool.py
+
+import codecs
+import hashlib
+import select
+import threading
+import time
+import weakref
+from collections import deque
+import paramiko
+
+class SSHConnectionPool:
+    """
+    Process-wide pool of authenticated SSH connections keyed by host, port, user
+    (and a fingerprint of the password, so one user's session is never handed to
+    someone with different credentials). Each command gets a fresh channel on the
+    pooled transport instead of a new TCP connection, key exchange and login.
+    """
+
+    def __init__(self, connect_timeout=10, keepalive_interval=30, idle_timeout=600, health_check_after=30):
+        self.connect_timeout = connect_timeout
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self._connections = {}  # key -> {"client", "last_used", "lock", "channels"}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def connection_key(host, port, username, password):
+        """Identity of a pooled connection; also safe to key per-credential caches with."""
+        fingerprint = hashlib.sha256((password or "").encode("utf-8")).hexdigest()[:16]
+        return (host, int(port), username, fingerprint)
+
+    def _connect(self, host, port, username, password, timeout=None):
+        # A caller's own deadline can only shorten the connect, banner and auth waits
+        timeout = self.connect_timeout if timeout is None else max(min(self.connect_timeout, timeout), 0.1)
+        client = paramiko.SSHClient()
+        # SECURITY NOTE: In a production environment, it's more secure to manage known_hosts properly.
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(hostname=host, port=int(port), username=username, password=password,
+                       timeout=timeout, banner_timeout=timeout, auth_timeout=timeout)
+        client.get_transport().set_keepalive(self.keepalive_interval)
+        return client
+
+    @staticmethod
+    def _is_healthy(client):
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+        try:
+            # Cheap round-trip-free probe: fails fast if the socket is dead
+            transport.send_ignore()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _in_use(entry, now):
+        """True while a channel handed out on this connection is still open; counts as use."""
+        if any(not channel.closed for channel in list(entry["channels"])):
+            entry["last_used"] = now
+            return True
+        return False
+
+    def _evict_idle(self, now):
+        with self._lock:
+            expired = [
+                key for key, entry in self._connections.items()
+                if now - entry["last_used"] > self.idle_timeout and not self._in_use(entry, now)
+            ]
+            entries = [self._connections.pop(key) for key in expired]
+        for entry in entries:
+            if entry["client"]:
+                entry["client"].close()
+
+    def get_client(self, host, port, username, password, connect_timeout=None):
+        """
+        Returns a connected SSHClient from the pool, reconnecting if the pooled one is dead.
+        `connect_timeout` caps a new login below the pool's default.
+        """
+        now = time.time()
+        self._evict_idle(now)
+        key = self.connection_key(host, port, username, password)
+
+        with self._lock:
+            entry = self._connections.setdefault(
+                key, {"client": None, "last_used": now, "lock": threading.Lock(), "channels": weakref.WeakSet()}
+            )
+
+        # Per-connection lock: concurrent callers for the same host share one login
+        with entry["lock"]:
+            client = entry["client"]
+            stale = client is not None and (
+                not client.get_transport() or not client.get_transport().is_active()
+                or (now - entry["last_used"] > self.health_check_after and not self._is_healthy(client))
+            )
+            if stale:
+                client.close()
+                client = None
+            if client is None:
+                client = self._connect(host, port, username, password, connect_timeout)
+                entry["client"] = client
+            entry["last_used"] = now
+            return client
+
+    def _track(self, host, port, username, password, channel):
+        """Records a channel handed out on a pooled connection, so its connection isn't evicted while it's open."""
+        with self._lock:
+            entry = self._connections.get(self.connection_key(host, port, username, password))
+            if entry is not None:
+                entry["channels"].add(channel)
+                entry["last_used"] = time.time()
+
+    def _touch(self, host, port, username, password):
+        """Restarts a connection's idle clock, e.g. when a long-running channel on it closes."""
+        with self._lock:
+            entry = self._connections.get(self.connection_key(host, port, username, password))
+            if entry is not None:
+                entry["last_used"] = time.time()
+
+    def discard(self, host, port, username, password):
+        """Closes and forgets a pooled connection (e.g. after a channel error)."""
+        with self._lock:
+            entry = self._connections.pop(self.connection_key(host, port, username, password), None)
+        if entry and entry["client"]:
+            entry["client"].close()
+
+    def open_channel(self, host, port, username, password, command, timeout=None, deadline=None):
+        """
+        Starts `command` on a new channel of the pooled connection and returns paramiko's
+        (stdin, stdout, stderr). If the pooled transport turns out to be broken the channel
+        is retried once on a fresh connection; the command itself is never re-run. With a
+        `deadline` (time.monotonic()), logging in counts against it and TimeoutError is
+        raised if it passes before the channel is open.
+        """
+        for attempt in range(2):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            try:
+                client = self.get_client(host, port, username, password, connect_timeout=remaining)
+            except Exception as e:
+                if deadline is not None and time.monotonic() >= deadline - 0.05:
+                    raise TimeoutError(f"no SSH connection to {host}:{port} within the time limit") from e
+                raise
+            try:
+                files = client.exec_command(command, timeout=timeout)
+                self._track(host, port, username, password, files[1].channel)
+                return files
+            except (paramiko.SSHException, EOFError, OSError):
+                self.discard(host, port, username, password)
+                if attempt:
+                    raise
+
+    def open_sftp(self, host, port, username, password):
+        """Opens an SFTP session on a new channel of the pooled connection, retried once like open_channel."""
+        for attempt in range(2):
+            client = self.get_client(host, port, username, password)
+            try:
+                sftp = client.open_sftp()
+                self._track(host, port, username, password, sftp.get_channel())
+                return sftp
+            except (paramiko.SSHException, EOFError, OSError):
+                self.discard(host, port, username, password)
+                if attempt:
+                    raise
+
+    def exec_command(self, host, port, username, password, command, timeout=None):
+        """Runs `command` over the pool and returns (exit_status, stdout, stderr)."""
+        stdin, stdout, stderr = self.open_channel(host, port, username, password, command, timeout)
+        output = stdout.read().decode('utf-8', 'replace')
+        errors = stderr.read().decode('utf-8', 'replace')
+        status = stdout.channel.recv_exit_status()
+        self._touch(host, port, username, password)
+        return status, output, errors
+
+    def stream_command(self, host, port, username, password, command, poll_interval=0.2, timeout=None):
+        """
+        Runs `command` over the pool and yields ("stdout" | "stderr", text) chunks as they
+        arrive, interleaved in arrival order, then a final ("exit", status). Closing the
+        generator early closes the channel; TimeoutError is raised after `timeout` seconds,
+        counted from the call so a slow login uses up the same budget.
+        """
+        # The time limit covers connecting and logging in as well as the command
+        deadline = None if timeout is None else time.monotonic() + timeout
+        stdin, stdout, stderr = self.open_channel(host, port, username, password, command, deadline=deadline)
+        channel = stdout.channel
+        decoders = {name: codecs.getincrementaldecoder("utf-8")("replace") for name in ("stdout", "stderr")}
+        try:
+            while True:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"command still running after {timeout:g}s")
+                select.select([channel], [], [], poll_interval)
+                while channel.recv_ready():
+                    yield "stdout", decoders["stdout"].decode(channel.recv(32768))
+                while channel.recv_stderr_ready():
+                    yield "stderr", decoders["stderr"].decode(channel.recv_stderr(32768))
+                # Data precedes the exit status on the transport, so nothing is left once it's in
+                if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                    break
+            for name, decoder in decoders.items():
+                tail = decoder.decode(b"", final=True)
+                if tail:
+                    yield name, tail
+            yield "exit", channel.recv_exit_status()
+        finally:
+            channel.close()
+            self._touch(host, port, username, password)
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._connections.values())
+            self._connections.clear()
+        for entry in entries:
+            if entry["client"]:
+                entry["client"].close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def get_ssh_pool():
+    """
+    The process-wide SSHConnectionPool shared by every dashboard page, so one host is
+    reached over a single authenticated transport whichever page asks for it.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SSHConnectionPool()
+        return _shared_pool
+
+
+class OutputBuffer:
+    """
+    Bounded ring buffer of (stream, line) pairs for streamed command output. Only the
+    newest `max_lines` lines (each capped at `max_line_length` characters) are kept, so a
+    command that prints gigabytes cannot grow dashboard memory.
+    """
+
+    def __init__(self, max_lines=5000, max_line_length=4096):
+        self.max_line_length = max_line_length
+        self._lines = deque(maxlen=max_lines)
+        self._partial = {"stdout": "", "stderr": ""}
+        self.total_lines = 0
+
+    def write(self, stream, text):
+        pending = self._partial[stream] + text
+        *complete, self._partial[stream] = pending.split("\n")
+        for line in complete:
+            self._append(stream, line)
+        # An unterminated line (e.g. a progress bar) is still capped
+        if len(self._partial[stream]) > self.max_line_length:
+            self._append(stream, self._partial[stream])
+            self._partial[stream] = ""
+
+    def _append(self, stream, line):
+        self._lines.append((stream, line[:self.max_line_length]))
+        self.total_lines += 1
+
+    def flush(self):
+        for stream, partial in self._partial.items():
+            if partial:
+                self._append(stream, partial)
+                self._partial[stream] = ""
+
+    @property
+    def dropped(self):
+        return self.total_lines - len(self._lines)
+
+    def text(self, stream=None):
+        """The buffered lines (optionally only one stream), including unterminated tails."""
+        lines = [line for name, line in self._lines if stream in (None, name)]
+        lines += [partial for name, partial in self._partial.items() if partial and stream in (None, name)]
+        return "\n".join(lines)
+
+    def has_stream(self, stream):
+        return any(name == stream for name, _ in self._lines) or bool(self._partial[stream])
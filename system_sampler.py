@@ -0,0 +1,121 @@
+# system_sampler.py
+
+import heapq
+import threading
+import time
+from collections import deque
+import psutil
+
+class SystemSampler:
+    """
+    Background thread that samples CPU (per core), memory, root disk, disk I/O,
+    network, load average and the top processes at a fixed cadence. Readers get the
+    latest snapshot instantly instead of calling psutil themselves, so CPU and I/O rates
+    (per-process CPU included) are always measured over a full interval no matter how
+    many sessions are reading.
+    """
+
+    def __init__(self, interval=2.0, history_size=300, top_n=5):
+        self.interval = interval
+        self.top_n = top_n
+        self._snapshot = None
+        self._top = None
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+
+    def start(self):
+        # Prime the CPU counters so the first real sample covers a full interval
+        psutil.cpu_percent(percpu=True)
+        top_processes()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        last_disk = psutil.disk_io_counters()
+        last_net = psutil.net_io_counters()
+        last_time = time.time()
+
+        while not self._stop.wait(self.interval):
+            now = time.time()
+            elapsed = max(now - last_time, 1e-6)
+            try:
+                per_core = psutil.cpu_percent(percpu=True)
+                mem = psutil.virtual_memory()
+                swap = psutil.swap_memory()
+                disk = psutil.disk_usage('/')
+                disk_io = psutil.disk_io_counters()
+                net = psutil.net_io_counters()
+                load = psutil.getloadavg()
+                # Scanned only here, so each process's CPU covers exactly one interval
+                top = top_processes(self.top_n)
+            except Exception:
+                continue
+
+            snapshot = {
+                "timestamp": now,
+                "cpu_percent": sum(per_core) / len(per_core) if per_core else 0.0,
+                "cpu_per_core": per_core,
+                "mem_total": mem.total,
+                "mem_available": mem.available,
+                "mem_percent": mem.percent,
+                "swap_percent": swap.percent,
+                "disk_total": disk.total,
+                "disk_used": disk.used,
+                "disk_free": disk.free,
+                "disk_percent": disk.percent,
+                "disk_read_bps": (disk_io.read_bytes - last_disk.read_bytes) / elapsed if disk_io and last_disk else 0.0,
+                "disk_write_bps": (disk_io.write_bytes - last_disk.write_bytes) / elapsed if disk_io and last_disk else 0.0,
+                "net_sent_bps": (net.bytes_sent - last_net.bytes_sent) / elapsed,
+                "net_recv_bps": (net.bytes_recv - last_net.bytes_recv) / elapsed,
+                "load_avg": load,
+            }
+            last_disk, last_net, last_time = disk_io, net, now
+
+            with self._lock:
+                self._snapshot = snapshot
+                self._top = top
+                self._history.append(snapshot)
+            self._ready.set()
+
+    def snapshot(self, timeout=None):
+        """Returns the latest sample, waiting up to `timeout` (default: one interval) for the first one."""
+        self._ready.wait(self.interval * 2 if timeout is None else timeout)
+        with self._lock:
+            return dict(self._snapshot) if self._snapshot else None
+
+    def processes(self, timeout=None):
+        """Returns the latest top-process lists (see top_processes), or None before the first sample."""
+        self._ready.wait(self.interval * 2 if timeout is None else timeout)
+        with self._lock:
+            return self._top
+
+    def history(self):
+        """Returns the recent samples, oldest first."""
+        with self._lock:
+            return list(self._history)
+
+
+PROCESS_ATTRS = ["pid", "name", "username", "cpu_percent", "memory_percent"]
+
+def top_processes(n=5):
+    """
+    Returns the top `n` processes by CPU and by memory from a single process_iter pass.
+    psutil caches the Process objects between calls, so CPU percentages cover the time
+    since the previous scan; call it only from SystemSampler so that is one interval.
+    """
+    processes = []
+    for proc in psutil.process_iter(attrs=PROCESS_ATTRS, ad_value=None):
+        info = proc.info
+        info["cpu_percent"] = info["cpu_percent"] or 0.0
+        info["memory_percent"] = round(info["memory_percent"] or 0.0, 2)
+        processes.append(info)
+
+    by_cpu = heapq.nlargest(n, processes, key=lambda p: p["cpu_percent"])
+    by_memory = heapq.nlargest(n, processes, key=lambda p: p["memory_percent"])
+    return {"by_cpu": by_cpu, "by_memory": by_memory, "total": len(processes)}